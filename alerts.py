@@ -0,0 +1,282 @@
+"""Headless cross-venue spread alerts.
+
+`AlertEngine.evaluate` runs on every new symbol x venue snapshot (recorder).
+Rules are grouped by kind and symbol scope into sorted arrays of their
+distinct thresholds: the number of levels a symbol exceeds is one
+`searchsorted` over its group, so comparing it with the previous snapshot's
+count gives exactly the levels that were crossed, and only those crossings
+reach Python. A rule fires once its condition held for `persist` consecutive
+snapshots, then stays silent until the condition clears (one alert per
+episode). The last values
+and open episodes are saved as JSON, so a restart does not fire them again.
+
+Rule kinds (all compare the APR spread, max - min venue, with `threshold`):
+
+- "spread": spread > threshold;
+- "flip": same, while the 48h pair average has the opposite sign;
+- "diverge": same, while the spread is far above its 48h pair average.
+
+"flip" and "diverge" use `kernels.spread_kernel`'s flags and need the
+"<venue>_avg" columns (`averages.read_averages`).
+"""
+import json
+import math
+import os
+from dataclasses import asdict, dataclass
+
+import numpy as np
+import pandas as pd
+import requests
+
+from kernels import spread_kernel
+from venues import EXCHANGES, error_class
+
+KINDS = ('spread', 'flip', 'diverge')
+
+
+@dataclass(frozen=True)
+class Rule:
+    id: str
+    threshold: float = 0.0      # APR spread in %
+    kind: str = "spread"
+    persist: int = 1            # consecutive snapshots the condition must hold
+    symbol: str = None          # None: every symbol
+
+    def __post_init__(self):
+        if self.kind not in KINDS: raise ValueError(f"rule {self.id!r}: unknown kind {self.kind!r}")
+        if self.persist < 1: raise ValueError(f"rule {self.id!r}: persist must be >= 1")
+
+
+@dataclass
+class Alert:
+    rule: str
+    kind: str
+    symbol: str
+    threshold: float
+    spread: float
+    pair_avg: float             # None without history
+    long: str
+    short: str
+    ts: str
+
+    @property
+    def message(self):
+        avg = "" if self.pair_avg is None else f", 48h avg {self.pair_avg:.1f}%"
+        return (f"{self.symbol}: spread {self.spread:.1f}% > {self.threshold:g}% [{self.kind}]{avg}"
+                f" - LONG {self.long} / SHORT {self.short}")
+
+
+def load_rules(path):
+    """Rules from a JSON list of Rule fields, e.g. [{"id": "big", "threshold": 50}]."""
+    with open(path) as fh:
+        return [Rule(**r) for r in json.load(fh)]
+
+
+class FileSink:
+    """Appends one JSON line per alert."""
+
+    def __init__(self, path):
+        self.path = path
+
+    def emit(self, alerts):
+        with open(self.path, "a") as fh:
+            for a in alerts: fh.write(json.dumps(asdict(a)) + "\n")
+
+
+class WebhookSink:
+    """POSTs each batch as {"text": <one line per alert>, "alerts": [...]}."""
+
+    def __init__(self, url, session=None, timeout=5.0):
+        self.url, self.timeout = url, timeout
+        self.session = session or requests.Session()
+
+    def emit(self, alerts):
+        body = {"text": "\n".join(a.message for a in alerts), "alerts": [asdict(a) for a in alerts]}
+        self.session.post(self.url, json=body, timeout=self.timeout).raise_for_status()
+
+
+class _Group:
+    """Rules of one kind and symbol scope, indexed by their distinct thresholds.
+
+    Rules sharing a threshold cross together, so the crossing work depends on
+    the number of distinct levels, not of rules.
+    """
+
+    def __init__(self, kind, scope, rules):
+        self.kind, self.scope = kind, scope
+        self.thresholds = np.array(sorted({r.threshold for r in rules}), dtype=float)
+        self.by_level = [{} for _ in self.thresholds]       # level -> {persist: [rules]}
+        for r in rules:
+            level = int(np.searchsorted(self.thresholds, r.threshold))
+            self.by_level[level].setdefault(r.persist, []).append(r)
+
+    def count(self, values):
+        # number of levels strictly below each value
+        return np.searchsorted(self.thresholds, values, side='left')
+
+
+class _ScopedGroups:
+    """Every single-symbol group of one kind, counted in one vectorized pass.
+
+    Thresholds are replaced by their rank among all distinct thresholds and
+    keyed by group (`group * (n_ranks + 1) + rank`), so one `searchsorted`
+    over the sorted keys counts, for each group, the levels below its
+    symbol's value.
+    """
+
+    def __init__(self, groups):
+        self.groups = groups
+        self.scopes = pd.Index([g.scope for g in groups])
+        self.ranks = np.unique(np.concatenate([g.thresholds for g in groups]))
+        self.width = len(self.ranks) + 1
+        self.keys = np.concatenate([gid * self.width + np.searchsorted(self.ranks, g.thresholds) for gid, g in enumerate(groups)])
+        self.offset = np.cumsum([0] + [len(g.thresholds) for g in groups[:-1]])     # first key of each group
+
+    def count(self, gids, values):
+        query = gids * self.width + np.searchsorted(self.ranks, values, side='left')
+        return np.searchsorted(self.keys, query, side='left') - self.offset[gids]
+
+
+class AlertEngine:
+    def __init__(self, rules, sinks=(), venues=EXCHANGES, min_count=2, state_path=None):
+        self.rules = {}
+        for r in rules:
+            if r.id in self.rules: raise ValueError(f"duplicate rule id {r.id!r}")
+            self.rules[r.id] = r
+        self.sinks = list(sinks)
+        self.venues, self.min_count = list(venues), min_count
+        self.state_path = state_path
+        self.seq = 0                # snapshots evaluated
+        self.values = {}            # kind -> Series of the previous condition values by symbol
+        self.active = {}            # (group, level, symbol) -> seq the episode started
+        self.errors = []            # sink failures of the last evaluate
+        self._due = {}              # seq -> [(group, level, symbol, since, persist)] waiting for persistence
+
+        by_scope = {}
+        for r in self.rules.values(): by_scope.setdefault((r.kind, r.symbol), []).append(r)
+        self._groups = {key: _Group(*key, group) for key, group in by_scope.items()}
+        self._by_kind = {}          # kind -> (group of every symbol or None, _ScopedGroups or None)
+        for kind in KINDS:
+            scoped = [g for (k, scope), g in self._groups.items() if k == kind and scope is not None]
+            if (kind, None) in self._groups or scoped:
+                self._by_kind[kind] = (self._groups.get((kind, None)), _ScopedGroups(scoped) if scoped else None)
+        if state_path and os.path.exists(state_path): self.load_state()
+
+    # --- Evaluation ---------------------------------------------------------
+    def evaluate(self, df, hist=None, ts=None):
+        """Alerts fired by the snapshot `df` (symbol + venue columns), emitted to every sink.
+
+        `hist` is an optional frame of "<venue>_avg" columns by symbol (needed
+        by "flip" / "diverge" rules), unless `df` already carries them.
+        """
+        ts = pd.Timestamp(ts if ts is not None else pd.Timestamp.now(tz='UTC'))
+        if hist is not None and not hist.empty: df = df.merge(hist, on='symbol', how='left')
+        venues = [v for v in self.venues if v in df.columns]
+        avg_cols = [f"{v}_avg" for v in venues]
+        values = df[venues].to_numpy(dtype=float)
+        hist_values = df.reindex(columns=avg_cols).to_numpy(dtype=float) if any(c in df.columns for c in avg_cols) else None
+        res = spread_kernel(values, venues, hist=hist_values, min_count=self.min_count)
+        symbols = pd.Index(df['symbol'].astype(str))
+        conditions = {
+            'spread': res.spread,
+            'flip': np.where(res.flip, res.spread, np.nan),
+            'diverge': np.where(res.diverge, res.spread, np.nan),
+        }
+
+        self.seq += 1
+        fired = []
+        for kind, (every, scoped) in self._by_kind.items():
+            cur = pd.Series(np.nan_to_num(conditions[kind], nan=-np.inf), index=symbols)
+            cur = cur[~cur.index.duplicated()]
+            prev = self.values.get(kind, pd.Series(dtype=float))
+            # Symbols that left the snapshot end their episodes
+            index = cur.index.union(prev.index)
+            c = cur.reindex(index, fill_value=-np.inf).to_numpy()
+            p = prev.reindex(index, fill_value=-np.inf).to_numpy()
+            crossings = []
+            if every is not None:
+                lo_c, lo_p = every.count(c), every.count(p)
+                crossed = np.flatnonzero(lo_c != lo_p)
+                crossings += [(every, i, a, b) for i, a, b in zip(crossed, lo_c[crossed], lo_p[crossed])]
+            if scoped is not None:
+                rows = index.get_indexer(scoped.scopes)
+                gids = np.flatnonzero(rows >= 0)
+                rows = rows[gids]
+                lo_c, lo_p = scoped.count(gids, c[rows]), scoped.count(gids, p[rows])
+                crossed = np.flatnonzero(lo_c != lo_p)
+                crossings += [(scoped.groups[g], i, a, b) for g, i, a, b in zip(gids[crossed], rows[crossed], lo_c[crossed], lo_p[crossed])]
+            for g, i, a, b in crossings:
+                symbol = index[i]
+                for level in range(b, a): fired += self._start(g, level, symbol)
+                for level in range(a, b): self.active.pop((g, level, symbol), None)
+            self.values[kind] = cur[np.isfinite(cur.to_numpy())]
+
+        for g, level, symbol, since, persist in self._due.pop(self.seq, []):
+            if self.active.get((g, level, symbol)) == since:
+                fired += [(r, symbol) for r in g.by_level[level][persist]]
+
+        alerts = self._alerts(fired, res, symbols, ts)
+        self.errors = []
+        if alerts:
+            for sink in self.sinks:
+                try: sink.emit(alerts)
+                except Exception as e: self.errors.append(f"{type(sink).__name__}: {error_class(e)}")
+        if self.state_path: self.save_state()
+        return alerts
+
+    def _start(self, g, level, symbol):
+        self.active[(g, level, symbol)] = self.seq
+        fired = []
+        for persist, rules in g.by_level[level].items():
+            if persist == 1: fired += [(r, symbol) for r in rules]
+            else: self._due.setdefault(self.seq + persist - 1, []).append((g, level, symbol, self.seq, persist))
+        return fired
+
+    def _alerts(self, fired, res, symbols, ts):
+        if not fired: return []
+        pos = {s: i for i, s in enumerate(symbols)}
+        ts, rows = ts.isoformat(), {}
+        alerts = []
+        for rule, symbol in fired:
+            if symbol not in rows:
+                i = pos[symbol]
+                avg = float(res.pair_avg[i])
+                rows[symbol] = (float(res.spread[i]), None if math.isnan(avg) else avg,
+                                res.venues[res.min_idx[i]], res.venues[res.max_idx[i]])
+            spread, avg, long, short = rows[symbol]
+            alerts.append(Alert(rule.id, rule.kind, symbol, rule.threshold, spread, avg, long, short, ts))
+        return alerts
+
+    # --- Persistence --------------------------------------------------------
+    def save_state(self, path=None):
+        path = path or self.state_path
+        state = {
+            "seq": self.seq,
+            "values": {k: v.to_dict() for k, v in self.values.items()},
+            "active": [[g.kind, g.scope, float(g.thresholds[level]), symbol, since]
+                       for (g, level, symbol), since in self.active.items()],
+        }
+        tmp = path + ".tmp"
+        with open(tmp, "w") as fh: json.dump(state, fh)
+        os.replace(tmp, path)
+
+    def load_state(self, path=None):
+        """Restore values and open episodes; thresholds no longer configured are dropped.
+
+        Rules added since the state was saved join from the next episode.
+        """
+        with open(path or self.state_path) as fh: state = json.load(fh)
+        self.seq = state["seq"]
+        self.values = {k: pd.Series(v, dtype=float) for k, v in state["values"].items() if k in KINDS}
+        self.active, self._due = {}, {}
+        for kind, scope, threshold, symbol, since in state["active"]:
+            g = self._groups.get((kind, scope))
+            if g is None: continue
+            level = int(np.searchsorted(g.thresholds, threshold))
+            if level == len(g.thresholds) or g.thresholds[level] != threshold: continue
+            self.active[(g, level, symbol)] = since
+            for persist in g.by_level[level]:
+                # State is saved after every snapshot: earlier deadlines were already handled
+                if since + persist - 1 > self.seq:
+                    self._due.setdefault(since + persist - 1, []).append((g, level, symbol, since, persist))
+        return self
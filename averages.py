@@ -0,0 +1,172 @@
+"""Incremental rolling-average index over the funding history.
+
+The recorder keeps, next to the raw history, per (symbol, venue) running sums
+and counts for the 1h / 8h / 48h / 7d windows. Each snapshot is added to every
+window and to its hourly bucket; buckets that slide out of a window since the
+previous update are subtracted from it. An update therefore costs
+O(symbols x venues) whatever the size of the history, and the dashboard only
+downloads the small averages artifact.
+
+Windows are hour-aligned: "48h" is the current (partial) hour plus the 47
+previous ones.
+
+Files (inside the history directory, ignored by the dataset readers)::
+
+    _rolling_buckets.parquet   hourly (symbol, venue, bucket, sum, count), `BUCKETS_SCHEMA`
+    _rolling_totals.parquet    per-window running sums / counts
+    _averages.parquet          published artifact: symbol x "<venue>_<window>" means
+"""
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import history
+
+WINDOWS = {'1h': 1, '8h': 8, '48h': 48, '7d': 168}   # window -> number of hourly buckets
+BUCKETS_NAME = "_rolling_buckets.parquet"
+TOTALS_NAME = "_rolling_totals.parquet"
+AVERAGES_NAME = "_averages.parquet"
+
+_KEY = ['symbol', 'venue']
+
+# Stored like `history.SCHEMA`: sorted by symbol/venue, dictionary-encoded keys,
+# float32 sums (the rates are float32 already) and int32 counts / hour numbers.
+BUCKETS_SCHEMA = pa.schema([
+    ('symbol', pa.string()),
+    ('venue', pa.string()),
+    ('bucket', pa.int32()),
+    ('sum', pa.float32()),
+    ('count', pa.int32()),
+])
+_NS_PER_HOUR = 3_600 * 10**9
+
+
+def hour_bucket(ts):
+    return int(pd.Timestamp(ts).value // _NS_PER_HOUR)
+
+def _sum_count(long, by):
+    return long.groupby(by, observed=True)['rate'].agg(sum='sum', count='count').astype({'count': 'int64'})
+
+def snapshot_to_long(df):
+    """Wide snapshot (symbol + venue columns) -> (symbol, venue) sum/count frame."""
+    long = history.to_long(df if 'timestamp' in df.columns else df.assign(timestamp=pd.Timestamp.now('UTC')))
+    long = long.astype({'symbol': str, 'venue': str})
+    return _sum_count(long, _KEY)
+
+
+class RollingIndex:
+    def __init__(self, buckets=None, totals=None, last_bucket=None):
+        # buckets: {hour bucket: sum/count frame indexed by (symbol, venue)}
+        # totals: running "sum_<w>"/"count_<w>" columns indexed by (symbol, venue)
+        self.buckets = buckets if buckets is not None else {}
+        self.totals = totals if totals is not None else pd.DataFrame(
+            index=pd.MultiIndex.from_arrays([[], []], names=_KEY),
+            columns=[f"{k}_{w}" for w in WINDOWS for k in ('sum', 'count')], dtype=float,
+        )
+        self.last_bucket = last_bucket
+
+    # --- Incremental update -------------------------------------------------
+    def update(self, df_snapshot, ts=None):
+        ts = ts if ts is not None else pd.to_datetime(df_snapshot['timestamp']).iloc[0]
+        bucket = hour_bucket(ts)
+        new = snapshot_to_long(df_snapshot)
+        last = self.last_bucket
+
+        totals = self.totals
+        for w, n in WINDOWS.items():
+            # Buckets that left the window since the previous update
+            if last is not None and bucket > last:
+                for b in [b for b in self.buckets if last - n < b <= bucket - n]:
+                    totals = totals.sub(self._as_window(self.buckets[b], w), fill_value=0)
+            # Late snapshot older than the window: nothing to add
+            if last is None or bucket > (max(last, bucket) - n):
+                totals = totals.add(self._as_window(new, w), fill_value=0)
+        totals = totals.fillna(0)
+        self.totals = totals[(totals[[f"count_{w}" for w in WINDOWS]] > 0).any(axis=1)]
+
+        self.buckets[bucket] = self.buckets[bucket].add(new, fill_value=0) if bucket in self.buckets else new
+        self.last_bucket = bucket if last is None else max(last, bucket)
+        horizon = self.last_bucket - max(WINDOWS.values())
+        for b in [b for b in self.buckets if b <= horizon]: del self.buckets[b]
+        return self
+
+    @staticmethod
+    def _as_window(df, w):
+        return df.rename(columns={'sum': f"sum_{w}", 'count': f"count_{w}"})
+
+    # --- Bootstrap from raw history (one-off, O(history)) -------------------
+    @classmethod
+    def rebuild(cls, long):
+        """Index from long history rows (symbol, venue, ts, rate)."""
+        if long.empty: return cls()
+        long = long.astype({'symbol': str, 'venue': str}).assign(
+            bucket=history.to_utc(long['ts']).astype('datetime64[ns, UTC]').astype('int64') // _NS_PER_HOUR
+        )
+        last = int(long['bucket'].max())
+        long = long[long['bucket'] > last - max(WINDOWS.values())]
+        flat = _sum_count(long, ['bucket'] + _KEY)
+        b = flat.index.get_level_values('bucket')
+        totals = pd.concat(
+            [cls._as_window(flat[b > last - n].groupby(level=_KEY).sum(), w) for w, n in WINDOWS.items()],
+            axis=1,
+        ).fillna(0)
+        return cls(cls._split_buckets(flat), totals, last)
+
+    @staticmethod
+    def _split_buckets(flat):
+        return {int(b): df.droplevel('bucket') for b, df in flat.groupby(level='bucket')}
+
+    # --- Outputs ------------------------------------------------------------
+    def averages(self, windows=None):
+        """Wide symbol frame with one "<venue>_<window>" mean column per pair."""
+        out = {}
+        for w in windows or WINDOWS:
+            with np.errstate(invalid='ignore', divide='ignore'):
+                avg = self.totals[f"sum_{w}"] / self.totals[f"count_{w}"].where(self.totals[f"count_{w}"] > 0)
+            wide = avg.unstack('venue')
+            for v in wide.columns: out[f"{v}_{w}"] = wide[v]
+        df = pd.DataFrame(out).astype('float32')
+        df.index.name = 'symbol'
+        return df.reset_index()
+
+    # --- Persistence --------------------------------------------------------
+    def save(self, root):
+        flat = pd.concat(self.buckets, names=['bucket']).reset_index() if self.buckets else pd.DataFrame(columns=BUCKETS_SCHEMA.names)
+        flat = flat[BUCKETS_SCHEMA.names].sort_values(_KEY + ['bucket'], kind='stable')
+        pq.write_table(
+            pa.Table.from_pandas(flat.astype({'symbol': str, 'venue': str}), schema=BUCKETS_SCHEMA, preserve_index=False),
+            os.path.join(root, BUCKETS_NAME), compression='zstd', use_dictionary=_KEY,
+        )
+        totals = pa.Table.from_pandas(self.totals.reset_index(), preserve_index=False)
+        totals = totals.replace_schema_metadata({**(totals.schema.metadata or {}), b"last_bucket": str(self.last_bucket).encode()})
+        pq.write_table(totals, os.path.join(root, TOTALS_NAME))
+        pq.write_table(
+            pa.Table.from_pandas(self.averages(), preserve_index=False),
+            os.path.join(root, AVERAGES_NAME), compression='zstd', use_dictionary=['symbol'],
+        )
+
+    @classmethod
+    def load(cls, root):
+        b_path, t_path = os.path.join(root, BUCKETS_NAME), os.path.join(root, TOTALS_NAME)
+        if not (os.path.exists(b_path) and os.path.exists(t_path)): return None
+        totals = pq.read_table(t_path)
+        last = totals.schema.metadata.get(b"last_bucket", b"None").decode()
+        return cls(
+            cls._split_buckets(pd.read_parquet(b_path).astype({'bucket': 'int64', 'sum': 'float64', 'count': 'int64'})
+                               .set_index(['bucket'] + _KEY)),
+            totals.to_pandas().set_index(_KEY),
+            None if last == "None" else int(last),
+        )
+
+
+def read_averages(source, window='48h'):
+    """Dashboard side: "<venue>_avg" columns of one window from the artifact.
+
+    `source` is the history directory or its base URL.
+    """
+    df = pd.read_parquet(f"{source}/{AVERAGES_NAME}")
+    cols = {c: f"{c[:-len(window) - 1]}_avg" for c in df.columns if c.endswith(f"_{window}")}
+    return df[['symbol'] + list(cols)].rename(columns=cols)
@@ -0,0 +1,295 @@
+"""Vectorized funding-capture backtest over the recorded history.
+
+    python backtest.py [--root funding_history] [--start 2026-08-01] [--entry 30] [--hold 8h] [--fee-bps 4.5]
+
+Replays the history as a (time x symbol x venue) rate cube and simulates the
+dashboard's trade: when a symbol's APR spread reaches `entry_spread`, go LONG
+the cheapest venue and SHORT the most expensive one, hold the pair for `hold`,
+then close. Funding accrues on both legs at the last recorded rate until the
+next snapshot; fees are charged per leg on entry and exit. A pair still open
+at the end of the history is closed at the last snapshot.
+
+The cube keeps the history as coded quotes and `run` expands one chunk of
+symbols at a time into a dense forward-filled array (within CUBE_BUDGET).
+`run_store` never holds the whole history either: it lists the symbols and
+the common snapshot grid with `history.distinct`, then queries, codes and
+runs one chunk of symbols at a time (row groups are sorted by symbol, so
+each query only reads that chunk), and memory follows the chunk size instead
+of the history size. Everything is computed for the whole chunk at once: legs, spreads and entry
+signals are array reductions, funding is a cumulative sum per (symbol,
+venue), and each trade's PnL is a difference of two cumulative sums. The only
+Python loop is over successive trades (at most span / hold iterations), each
+one handling every symbol of the chunk with array indexing.
+"""
+import argparse
+import os
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+import history
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+CUBE_BUDGET = 256 * 1024 * 1024     # bytes of float64 cube per symbol chunk
+
+
+@dataclass
+class BacktestConfig:
+    entry_spread: float = 30.0      # APR % spread needed to open a pair
+    hold: str = "8h"                # holding period (pandas Timedelta string)
+    fee_bps: float = 4.5            # per leg and per side (entry and exit)
+    min_venues: int = 2
+
+
+@dataclass
+class Cube:
+    """(time x symbol x venue) rates kept as coded quotes (one row per quote).
+
+    The dense, forward-filled array only exists one symbol chunk at a time
+    (`block`, within CUBE_BUDGET), but the coded quotes hold every row of the
+    history given: use `run_store` for histories that do not fit in memory.
+    """
+    ts: np.ndarray                  # (T,) int64 ns, sorted
+    symbols: np.ndarray             # (S,)
+    venues: list                    # (V,)
+    t: np.ndarray                   # (N,) time index of each quote
+    s: np.ndarray                   # (N,) symbol index
+    v: np.ndarray                   # (N,) venue index
+    rate: np.ndarray                # (N,) APR %
+
+    @property
+    def shape(self):
+        return len(self.ts), len(self.symbols), len(self.venues)
+
+    def block(self, start, stop):
+        """Dense (T, stop - start, V) APR % of symbols [start, stop), NaN until first quoted."""
+        T, _, V = self.shape
+        rows = np.flatnonzero((self.s >= start) & (self.s < stop))
+        values = np.full((T, stop - start, V), np.nan)
+        values[self.t[rows], self.s[rows] - start, self.v[rows]] = self.rate[rows]
+        return _ffill(values)
+
+    @classmethod
+    def from_long(cls, long, venues=None, ts=None):
+        """Cube from long rows (symbol, venue, ts, rate), e.g. `load(...)`.
+
+        `ts` (int64 ns, sorted) sets the time axis, e.g. the grid of the
+        whole store when `long` is only a chunk of its symbols.
+        """
+        if venues: long = long[long['venue'].isin(venues)]
+        t_codes, ts = _time_codes(long['ts'], ts)
+        s_codes, symbols = _recode(long['symbol'], sorted)
+        known = venues or history.VENUE_COLUMNS
+        v_codes, found = _recode(long['venue'], lambda found: [v for v in known if v in found] + sorted(set(found) - set(known)))   # dashboard order
+        return cls(ts, symbols, list(found), t_codes, s_codes, v_codes, long['rate'].to_numpy())
+
+    @classmethod
+    def from_dense(cls, ts, symbols, venues, values):
+        """Cube from a dense (T, S, V) array, NaN where not quoted."""
+        t, s, v = np.nonzero(~np.isnan(values))
+        return cls(np.asarray(ts), np.asarray(symbols, dtype=object), list(venues), t, s, v, values[t, s, v])
+
+
+def _index_type(n):
+    return np.min_scalar_type(max(n - 1, 0))
+
+def _time_codes(column, grid=None, chunk=1 << 23):
+    """(codes, sorted int64 ns timestamps) of the column's own times or of
+    `grid`; codes are filled chunk by chunk instead of a full-length int64
+    factorization."""
+    # Epoch integers are UTC for tz-aware and naive (taken as UTC) columns alike: no converted copy
+    dates = (column if column.dtype.kind == 'M' else history.to_utc(column)).array
+    values = dates.asi8
+    if grid is None: ts = np.sort(pd.unique(values))
+    else: ts = np.asarray(grid, dtype=np.int64).view("M8[ns]").astype(f"M8[{dates.unit}]").view(np.int64)
+    codes = np.empty(len(values), dtype=_index_type(len(ts)))
+    for i in range(0, len(values), chunk): codes[i:i + chunk] = np.searchsorted(ts, values[i:i + chunk])
+    return codes, ts.astype(f"M8[{dates.unit}]").astype("M8[ns]").view(np.int64)
+
+def _recode(column, order):
+    """(codes, names) of the values used in a categorical or plain column,
+    numbered as `order(names)` lists them, through a per-name lookup table."""
+    if isinstance(column.dtype, pd.CategoricalDtype): codes, names = column.cat.codes.to_numpy(), column.cat.categories
+    else: codes, names = pd.factorize(column)
+    used = np.sort(pd.unique(codes))
+    used = used[used >= 0]
+    found = pd.Index(names[used]).astype(str)
+    final = order(list(found))
+    lookup = np.zeros(len(names), dtype=_index_type(len(final)))
+    lookup[used] = pd.Index(final).get_indexer(found)
+    return lookup[codes], np.asarray(final, dtype=object)
+
+
+def _ffill(values):
+    """Forward-fill NaNs along the time axis (a venue missing from one snapshot)."""
+    t = np.arange(values.shape[0]).reshape(-1, *([1] * (values.ndim - 1)))
+    last = np.maximum.accumulate(np.where(np.isnan(values), 0, t), axis=0)
+    return np.take_along_axis(values, last, axis=0)
+
+
+@dataclass
+class BacktestResult:
+    trades: pd.DataFrame
+    config: BacktestConfig = field(default_factory=BacktestConfig)
+    shape: tuple = (0, 0, 0)        # snapshots x symbols x venues replayed
+    span: tuple = (None, None)      # first and last snapshot
+
+    def by_pair(self):
+        """Cumulative PnL (% of notional per leg) per symbol and venue pair."""
+        return self._summary(['symbol', 'long', 'short'])
+
+    def by_symbol(self):
+        return self._summary(['symbol'])
+
+    def _summary(self, keys):
+        t = self.trades
+        if t.empty: return pd.DataFrame(columns=keys + ['trades', 'funding_pnl', 'fees', 'net_pnl', 'win_rate', 'hours'])
+        g = t.assign(win=t['net_pnl'] > 0, hours=(t['exit_ts'] - t['entry_ts']).dt.total_seconds() / 3600).groupby(keys, observed=True)
+        out = g.agg(trades=('net_pnl', 'size'), funding_pnl=('funding_pnl', 'sum'), fees=('fees', 'sum'),
+                    net_pnl=('net_pnl', 'sum'), win_rate=('win', 'mean'), hours=('hours', 'sum'))
+        return out.sort_values('net_pnl', ascending=False).reset_index()
+
+    def equity(self):
+        """Cumulative net PnL of the whole book, stamped at each trade exit."""
+        t = self.trades.sort_values('exit_ts', kind='stable')
+        return pd.Series(t['net_pnl'].cumsum().to_numpy(), index=t['exit_ts'], name='equity')
+
+
+def _trades_chunk(ts, values, venues, symbols, cfg):
+    T, S, _ = values.shape
+    quoted = ~np.isnan(values)
+    valid = quoted.sum(axis=2) >= cfg.min_venues
+    lo = np.where(quoted, values, np.inf).argmin(axis=2)
+    hi = np.where(quoted, values, -np.inf).argmax(axis=2)
+    spread = np.take_along_axis(values, hi[..., None], 2)[..., 0] - np.take_along_axis(values, lo[..., None], 2)[..., 0]
+    with np.errstate(invalid='ignore'):
+        signal = valid & (spread >= cfg.entry_spread)
+
+    # Funding accrued up to ts[t] (fraction of notional), rate held until the next snapshot
+    dt = np.diff(ts).astype(float) / 1e9
+    carry = np.nan_to_num(values[:-1]) * dt[:, None, None] / (100 * SECONDS_PER_YEAR)
+    cum = np.concatenate([np.zeros((1, S, values.shape[2])), np.cumsum(carry, axis=0)])
+
+    # nxt[t, s]: first signal index >= t (T if none)
+    steps = np.where(signal, np.arange(T)[:, None], T)
+    nxt = np.vstack([np.minimum.accumulate(steps[::-1], axis=0)[::-1], np.full((1, S), T)])
+
+    hold = pd.Timedelta(cfg.hold).value
+    cols = np.arange(S)
+    cursor = np.zeros(S, dtype=np.int64)
+    out = []
+    while True:
+        entry = nxt[cursor, cols]
+        active = entry < T - 1
+        if not active.any(): break
+        s, entry = cols[active], entry[active]
+        exit_ = np.clip(np.searchsorted(ts, ts[entry] + hold, side='left'), entry + 1, T - 1)
+        l, h = lo[entry, s], hi[entry, s]
+        pnl = (cum[exit_, s, h] - cum[entry, s, h]) - (cum[exit_, s, l] - cum[entry, s, l])
+        out.append((s, l, h, entry, exit_, spread[entry, s], pnl))
+        cursor = np.full(S, T, dtype=np.int64)
+        cursor[s] = exit_
+    if not out: return None
+    s, l, h, entry, exit_, sp, pnl = (np.concatenate(x) for x in zip(*out))
+    names = np.asarray(venues, dtype=object)
+    fees = 4 * cfg.fee_bps / 100       # 2 legs x (entry + exit), in %
+    return pd.DataFrame({
+        'symbol': symbols[s], 'long': names[l], 'short': names[h],
+        'entry_ts': pd.to_datetime(ts[entry], utc=True), 'exit_ts': pd.to_datetime(ts[exit_], utc=True),
+        'entry_spread': sp, 'funding_pnl': pnl * 100, 'fees': fees, 'net_pnl': pnl * 100 - fees,
+    })
+
+
+def run(cube, config=None):
+    """Backtest every symbol of `cube` under `config`, one dense symbol chunk at a time."""
+    cfg = config or BacktestConfig()
+    T, S, V = cube.shape
+    chunk = _chunk_size(T, V)
+    frames = []
+    for i in range(0, S, chunk):
+        j = min(S, i + chunk)
+        df = _trades_chunk(cube.ts, cube.block(i, j), cube.venues, cube.symbols[i:j], cfg)
+        if df is not None: frames.append(df)
+    return _result(frames, cfg, cube.shape, cube.ts)
+
+
+def run_store(source=history.HISTORY_DIR, config=None, symbols=None, venues=None, start=None, end=None):
+    """`run` over a partitioned store, one chunk of symbols loaded at a time.
+
+    Every chunk is coded on the snapshot grid of the whole selection, so the
+    trades do not depend on the chunking. A single (legacy) Parquet file is
+    loaded whole.
+    """
+    cfg = config or BacktestConfig()
+    if not os.path.isdir(source):
+        long = load(source, symbols, venues, start, end)
+        return run(Cube.from_long(long, venues), cfg) if len(long) else _result([], cfg, (0, 0, 0), [])
+    keys = history.distinct(symbols=symbols, venues=venues, start=start, end=end, root=source)
+    ts = keys['ts'].as_unit("ns").asi8
+    T, S, V = len(ts), len(keys['symbol']), len(keys['venue'])
+    chunk = _chunk_size(T, V)
+    frames = []
+    for i in range(0, S, chunk):
+        long = history.query(list(keys['symbol'][i:i + chunk]), venues, start, end, root=source, categorical=True)
+        cube = Cube.from_long(long, venues, ts)
+        del long
+        frames.append(run(cube, cfg).trades)
+    return _result(frames, cfg, (T, S, V), ts)
+
+
+def _chunk_size(T, V):
+    return max(1, int(CUBE_BUDGET // max(1, 8 * T * V * 4)))     # values + 3 same-size temporaries
+
+
+def _result(frames, cfg, shape, ts):
+    frames = [f for f in frames if f is not None and len(f)]
+    trades = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(
+        columns=['symbol', 'long', 'short', 'entry_ts', 'exit_ts', 'entry_spread', 'funding_pnl', 'fees', 'net_pnl'])
+    span = tuple(pd.to_datetime(np.asarray(ts)[[0, -1]], utc=True)) if len(ts) else (None, None)
+    return BacktestResult(trades.sort_values(['entry_ts', 'symbol'], kind='stable').reset_index(drop=True), cfg, shape, span)
+
+
+def load(source=history.HISTORY_DIR, symbols=None, venues=None, start=None, end=None):
+    """Long history from the partitioned store, or from a single (legacy wide) Parquet file."""
+    if os.path.isdir(source): return history.query(symbols, venues, start, end, root=source, categorical=True)
+    df = pd.read_parquet(source)
+    long = df if 'venue' in df.columns else history.to_long(df)
+    if symbols: long = long[long['symbol'].isin(history._as_list(symbols))]
+    if start is not None: long = long[history.to_utc(long['ts']) >= history._ts(start)]
+    if end is not None: long = long[history.to_utc(long['ts']) < history._ts(end)]
+    return long
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Backtest du funding capté sur les paires LONG/SHORT de l'historique.")
+    parser.add_argument("--root", default=history.HISTORY_DIR, help="historique partitionné (ou fichier .parquet)")
+    parser.add_argument("--start", help="début (UTC), ex. 2026-08-01")
+    parser.add_argument("--end", help="fin exclue (UTC)")
+    parser.add_argument("--symbols", nargs="*", help="symboles à rejouer (tous par défaut)")
+    parser.add_argument("--venues", nargs="*", help="venues autorisées pour les jambes")
+    parser.add_argument("--entry", type=float, default=BacktestConfig.entry_spread, help="spread APR %% d'entrée")
+    parser.add_argument("--hold", default=BacktestConfig.hold, help="durée de détention, ex. 8h, 1d")
+    parser.add_argument("--fee-bps", type=float, default=BacktestConfig.fee_bps, help="frais par jambe et par côté (bps)")
+    parser.add_argument("--top", type=int, default=20, help="paires affichées")
+    parser.add_argument("--trades", help="export CSV des trades")
+    args = parser.parse_args(argv)
+
+    cfg = BacktestConfig(args.entry, args.hold, args.fee_bps)
+    result = run_store(args.root, cfg, args.symbols, args.venues, args.start, args.end)
+    if not result.shape[0]:
+        print("⚠️ Aucun historique sur cette période.")
+        return
+
+    T, S, V = result.shape
+    print(f"📊 {T} snapshots x {S} symboles x {V} venues ({result.span[0]:%Y-%m-%d %H:%M} -> {result.span[1]:%Y-%m-%d %H:%M})")
+    print(f"🔁 {len(result.trades)} trades, PnL net total : {result.trades['net_pnl'].sum():.3f} % du notionnel par jambe")
+    with pd.option_context('display.width', 160, 'display.max_columns', 20):
+        print(result.by_pair().head(args.top).round(3).to_string(index=False))
+    if args.trades:
+        result.trades.to_csv(args.trades, index=False)
+        print(f"✅ Trades exportés : {args.trades}")
+
+
+if __name__ == "__main__":
+    main()
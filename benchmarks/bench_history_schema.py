@@ -0,0 +1,73 @@
+"""Size and scan time: former wide history layout vs the long storage schema.
+
+    python benchmarks/bench_history_schema.py [funding_history.parquet] [--scale N]
+
+Writes the same history in both layouts (day partitions, one file per day)
+and times a full scan and a single-symbol scan of each. `--scale` replicates
+the symbol universe to project larger venue/symbol counts.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import history  # noqa: E402
+
+
+def scale_symbols(df, n):
+    if n <= 1: return df
+    return pd.concat([df.assign(symbol=df['symbol'] + (f"_{i}" if i else "")) for i in range(n)], ignore_index=True)
+
+def write_wide(df, root):
+    for day, d in df.groupby(pd.to_datetime(df['timestamp']).dt.date):
+        os.makedirs(os.path.join(root, f"date={day}"), exist_ok=True)
+        d.to_parquet(os.path.join(root, f"date={day}", "part-compacted.parquet"), engine='pyarrow', compression='snappy', index=False)
+
+def write_long(df, root):
+    long = history.to_long(df)
+    for day, d in long.groupby(long['ts'].dt.date):
+        os.makedirs(os.path.join(root, f"date={day}"), exist_ok=True)
+        history._write_atomic(history._to_table(d), os.path.join(root, f"date={day}", "part-compacted.parquet"))
+
+def dir_size(root):
+    return sum(os.path.getsize(os.path.join(d, f)) for d, _, fs in os.walk(root) for f in fs)
+
+def timed(func, repeat=5):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter(); out = func(); best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("source", nargs="?", default=os.path.join(os.path.dirname(__file__), "..", history.LEGACY_FILE))
+    parser.add_argument("--scale", type=int, default=1)
+    args = parser.parse_args()
+
+    df = scale_symbols(pd.read_parquet(args.source).reset_index(drop=True), args.scale)
+    symbol = df['symbol'].value_counts().index[0]
+    with tempfile.TemporaryDirectory() as tmp:
+        wide_root, long_root = os.path.join(tmp, "wide"), os.path.join(tmp, "long")
+        write_wide(df, wide_root)
+        write_long(df, long_root)
+        wide_ds = ds.dataset(wide_root, format="parquet", partitioning="hive")
+        long_ds = history.open_dataset(long_root)
+
+        rows = [
+            ("size on disk (MB)", dir_size(wide_root) / 1e6, dir_size(long_root) / 1e6),
+            ("full scan (s)", timed(lambda: wide_ds.to_table())[0], timed(lambda: long_ds.to_table())[0]),
+            (f"symbol={symbol} scan (s)",
+             timed(lambda: wide_ds.to_table(filter=ds.field('symbol') == symbol))[0],
+             timed(lambda: long_ds.to_table(filter=ds.field('symbol') == symbol))[0]),
+        ]
+        n_groups = sum(pq.ParquetFile(f.path).num_row_groups for f in long_ds.get_fragments())
+        print(f"{len(df)} wide rows, {df['symbol'].nunique()} symbols, long row groups: {n_groups}")
+        print(f"{'':<28} {'wide':>10} {'long':>10}")
+        for name, w, l in rows: print(f"{name:<28} {w:>10.4f} {l:>10.4f}")
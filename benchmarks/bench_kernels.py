@@ -0,0 +1,117 @@
+"""Spread kernel vs the former row-wise `DataFrame.apply` path.
+
+    python benchmarks/bench_kernels.py
+
+Times the Multi-DEX page computation (spread, opportunity, trade action,
+pair average, styling) at growing symbol x venue sizes, and checks both paths
+produce the same table.
+"""
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from kernels import opportunity_score, spread_kernel, style_frame  # noqa: E402
+
+ALERT_CSS = 'color: #FFD700; font-weight: bold; background-color: #333300'
+
+
+def make_frame(n_symbols, n_venues, seed=0):
+    rng = np.random.default_rng(seed)
+    venues = [f"V{i}" for i in range(n_venues)]
+    live = rng.normal(10, 40, (n_symbols, n_venues))
+    live[rng.random(live.shape) < 0.3] = np.nan
+    hist = rng.normal(10, 20, (n_symbols, n_venues))
+    df = pd.DataFrame(live, columns=venues)
+    df.insert(0, 'symbol', [f"SYM{i}" for i in range(n_symbols)])
+    for i, v in enumerate(venues): df[f"{v}_avg"] = hist[:, i]
+    return df[df[venues].notna().sum(axis=1) >= 2].reset_index(drop=True), venues
+
+
+# --- Former implementation (row-wise apply), kept here as the baseline ---
+def legacy_path(df_live, selected_ex):
+    def get_opportunity_score(spread):
+        if spread > 100: return "🔥 HIGH"
+        elif spread > 30: return "⚡ MEDIUM"
+        return "❄️ LOW"
+
+    def get_main_trade(row):
+        vals = row[selected_ex].dropna()
+        return f"🟢 LONG {vals.idxmin()} / 🔴 SHORT {vals.idxmax()}"
+
+    def calc_pair_history(row):
+        vals = row[selected_ex].dropna()
+        if len(vals) < 2: return None
+        long, short = vals.idxmin(), vals.idxmax()
+        l_hist, s_hist = f"{long}_avg", f"{short}_avg"
+        if l_hist in row and s_hist in row and pd.notna(row[l_hist]) and pd.notna(row[s_hist]):
+            return row[s_hist] - row[l_hist]
+        return None
+
+    def style_main(row):
+        styles = ['' for _ in row.index]
+        vals = row[selected_ex].astype(float)
+        if vals.notna().sum() >= 2:
+            styles[row.index.get_loc(vals.idxmin())] = 'background-color: #006400; color: white'
+            styles[row.index.get_loc(vals.idxmax())] = 'background-color: #8B0000; color: white'
+        if '48h Pair Avg' in row and pd.notna(row['48h Pair Avg']):
+            curr, avg = row['APR Spread'], row['48h Pair Avg']
+            flip = (curr > 0 and avg < 0) or (curr < 0 and avg > 0)
+            diff = abs(curr - avg) > 5 and abs(curr) > abs(avg) * 2
+            if flip or diff:
+                styles[row.index.get_loc('APR Spread')] = ALERT_CSS
+        return styles
+
+    df_live = df_live.copy()
+    df_live['APR Spread'] = df_live[selected_ex].max(axis=1) - df_live[selected_ex].min(axis=1)
+    df_live['Opportunity'] = df_live['APR Spread'].apply(get_opportunity_score)
+    df_live['Trade Action'] = df_live.apply(get_main_trade, axis=1)
+    df_live['48h Pair Avg'] = df_live.apply(calc_pair_history, axis=1)
+    df_final = df_live.sort_values('APR Spread', ascending=False, kind='stable')
+    cols = ['symbol'] + selected_ex + ['APR Spread', '48h Pair Avg', 'Opportunity', 'Trade Action']
+    styler = df_final[cols].style.apply(style_main, axis=1)
+    styler._compute()
+    return df_final[cols], styler
+
+
+def kernel_path(df_live, selected_ex):
+    hist = df_live[[f"{e}_avg" for e in selected_ex]].to_numpy(dtype=float)
+    res = spread_kernel(df_live[selected_ex].to_numpy(dtype=float), selected_ex, hist=hist)
+    order = np.argsort(-res.spread, kind='stable')
+    res = res.take(order)
+    df_final = df_live.iloc[order].copy()
+    df_final['APR Spread'] = res.spread
+    df_final['48h Pair Avg'] = res.pair_avg
+    df_final['Opportunity'] = opportunity_score(res.spread)
+    df_final['Trade Action'] = res.action
+    cols = ['symbol'] + selected_ex + ['APR Spread', '48h Pair Avg', 'Opportunity', 'Trade Action']
+    css = style_frame(df_final.index, cols, res, spread_col='APR Spread', spread_mask=res.alert, spread_css=ALERT_CSS)
+    styler = df_final[cols].style.apply(lambda _: css, axis=None)
+    styler._compute()
+    return df_final[cols], styler
+
+
+def best_of(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = func(*args)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+if __name__ == "__main__":
+    print(f"{'symbols':>8} {'venues':>6} {'apply (s)':>10} {'kernel (s)':>10} {'speedup':>8}")
+    for n_symbols, n_venues in [(300, 5), (1000, 5), (3000, 10), (5000, 30)]:
+        df_live, venues = make_frame(n_symbols, n_venues)
+        t_old, (old, old_sty) = best_of(legacy_path, df_live, venues, repeat=1)
+        t_new, (new, new_sty) = best_of(kernel_path, df_live, venues)
+        pd.testing.assert_frame_equal(
+            old.reset_index(drop=True).astype({'48h Pair Avg': float}), new.reset_index(drop=True),
+            check_dtype=False,
+        )
+        assert old_sty.ctx == new_sty.ctx
+        print(f"{n_symbols:>8} {n_venues:>6} {t_old:>10.3f} {t_new:>10.4f} {t_old / t_new:>7.0f}x")
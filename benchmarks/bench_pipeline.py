@@ -0,0 +1,142 @@
+"""pytest-benchmark suite of the fetch -> normalize -> merge -> spread -> table pipeline.
+
+    pytest benchmarks/bench_pipeline.py --benchmark-group-by=func
+    FIXTURES=fixtures/ pytest benchmarks/bench_pipeline.py      # replay captured responses
+
+Named bench_* so a bare `pytest` never collects it; pass the file
+explicitly as above.
+
+Every stage of the dashboard (main.py) and recorder (recorder.py) paths is
+timed at 1x, 10x and 100x the symbol count, against a local replay server
+(`fake_venues.FakeVenueServer`), so no exchange is contacted. Payloads are the
+responses captured with `python fake_venues.py --capture fixtures/` when
+FIXTURES is set, otherwise the seeded synthetic payloads (200 symbols);
+`fake_venues.scale_payloads` multiplies either. Compare runs with
+`--benchmark-save` / `--benchmark-compare`.
+"""
+import os
+import sys
+
+import pytest
+
+pytest.importorskip("pytest_benchmark")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+import averages  # noqa: E402
+import history  # noqa: E402
+import recorder  # noqa: E402
+from fake_venues import FakeVenueServer, load_fixtures, sample_payloads, scale_payloads  # noqa: E402
+from hip3 import Hip3Fetcher  # noqa: E402
+from kernels import spread_kernel  # noqa: E402
+from streamlit import dataframe_util  # noqa: E402
+from symbols import SymbolRegistry  # noqa: E402
+from tables import multidex_table  # noqa: E402
+from venues import EXCHANGES, FetchEngine, TokenBucket, VenueMatrix, combine, default_venues, merge_venues  # noqa: E402
+
+SCALES = [1, 10, 100]
+FIXTURES = os.environ.get("FIXTURES")
+
+
+@pytest.fixture(scope="module", params=SCALES, ids=lambda s: f"{s}x")
+def replay(request):
+    payloads = load_fixtures(FIXTURES) if FIXTURES else sample_payloads()
+    with FakeVenueServer(scale_payloads(payloads, request.param)) as srv:
+        engine = FetchEngine(default_venues(urls=srv.urls(), timeout=30, hl_bucket=TokenBucket(rate=1e9, capacity=1e9)), deadline=60)
+        frames = engine.snapshot()
+        yield srv, engine, frames
+        engine.close()
+
+
+@pytest.fixture(scope="module")
+def matrix(replay):
+    _, _, frames = replay
+    return merge_venues(frames)
+
+
+# --- Dashboard (main.py) --------------------------------------------------------
+def test_fetch(benchmark, replay):
+    """HTTP + parse + normalize of every venue (no previous response to reuse)."""
+    _, engine, _ = replay
+    frames = benchmark.pedantic(engine.snapshot, setup=engine._cache.clear, rounds=5)
+    assert all(engine.stats[name].error is None for name in frames)
+
+
+def test_fetch_unchanged(benchmark, replay):
+    """Same bodies as the previous refresh: hashed, not parsed again."""
+    _, engine, _ = replay
+    engine.snapshot()
+    benchmark(engine.snapshot)
+    assert all(engine.stats[name].cache for name in EXCHANGES)
+
+
+def test_parse(benchmark, replay):
+    srv, engine, _ = replay
+    venues = [(v, srv.payloads[v.name]) for v in engine.venues]
+    benchmark(lambda: [v.parse(payload) for v, payload in venues])
+
+
+def test_normalize(benchmark, replay):
+    """Raw tickers -> canonical symbols, cold registry (first refresh of a process)."""
+    srv, engine, _ = replay
+    raw = [(v.name, v.parse(srv.payloads[v.name])['symbol']) for v in engine.venues]
+    benchmark(lambda: [SymbolRegistry().normalize(tickers, name) for name, tickers in raw])
+
+
+def test_merge(benchmark, replay):
+    _, _, frames = replay
+    benchmark(combine, frames)
+
+
+def test_merge_one_venue_changed(benchmark, replay):
+    _, _, frames = replay
+    matrix = VenueMatrix()
+    matrix.update(frames)
+    first = EXCHANGES[0]
+    changed = [frames[first].assign(**{first: frames[first][first] + i}) for i in range(2)]
+    rounds = iter(range(10 ** 9))
+    benchmark(lambda: matrix.update({**frames, first: changed[next(rounds) % 2]}))
+
+
+def test_spread(benchmark, matrix):
+    values = matrix[EXCHANGES].to_numpy(dtype=float)
+    benchmark(spread_kernel, values, EXCHANGES)
+
+
+def test_table(benchmark, matrix):
+    """Payload built once per snapshot version (kernel, sort, alert marks, Arrow)."""
+    benchmark(multidex_table, matrix, EXCHANGES)
+
+
+def test_render(benchmark, matrix):
+    """Per-rerun cost of the cached payload (Arrow serialization)."""
+    table = multidex_table(matrix, EXCHANGES)
+    benchmark(dataframe_util.convert_anything_to_arrow_bytes, table.arrow)
+
+
+def test_hip3_refresh(benchmark, replay):
+    srv, _, _ = replay
+    fetcher = Hip3Fetcher(url=srv.urls()['Hyperliquid'], bucket=TokenBucket(rate=1e9, capacity=1e9), timeout=30, deadline=60)
+    fetcher.refresh()
+    df = benchmark(fetcher.refresh)
+    assert not df.empty and not fetcher.errors
+
+
+# --- Recorder (recorder.py) -----------------------------------------------------
+def test_recorder_snapshot(benchmark, replay):
+    _, engine, _ = replay
+    matrix = VenueMatrix()
+    df = benchmark.pedantic(recorder.fetch_all_rates, args=(engine, matrix), setup=engine._cache.clear, rounds=5)
+    assert not df.empty
+
+
+def test_recorder_append(benchmark, replay, tmp_path):
+    _, _, frames = replay
+    snapshot = merge_venues(frames).assign(timestamp=history.to_utc(["2026-01-01"])[0])
+    benchmark(history.append_batch, [snapshot], str(tmp_path))
+
+
+def test_recorder_rolling_index(benchmark, replay):
+    _, _, frames = replay
+    snapshot = merge_venues(frames).assign(timestamp=history.to_utc(["2026-01-01"])[0])
+    index = averages.RollingIndex()
+    benchmark(index.update, snapshot)
@@ -0,0 +1,83 @@
+"""Per-rerun render cost of the Multi-DEX table: fresh Styler vs cached payload.
+
+    python benchmarks/bench_render.py
+
+Times what `st.dataframe` does on every rerun of every session, at growing
+table sizes, without a browser (Streamlit's own marshalling functions):
+
+- apply: the pre-series page, row-wise `apply` helpers and `style_main`
+  (`bench_kernels.legacy_path`) + formats, marshalled;
+- kernel Styler: spread kernel + CSS frame + a new formatted Styler,
+  marshalled (the page after the kernel change, still one Styler per rerun);
+- arrow: the cached `TablePayload.arrow`, serialized (what a rerun does now);
+- build: building the payload, once per snapshot version.
+
+Checks that the payload carries the same rows as the Styler paths and marks
+exactly the rows they highlighted.
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from streamlit import dataframe_util
+from streamlit.elements.lib.pandas_styler_utils import marshall_styler
+from streamlit.proto.ArrowData_pb2 import ArrowData
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from bench_kernels import ALERT_CSS, best_of, legacy_path, make_frame  # noqa: E402
+from kernels import opportunity_score, spread_kernel, style_frame  # noqa: E402
+from tables import ALERT_MARK, multidex_table  # noqa: E402
+
+
+def pct_formats(columns):
+    return {c: "{:.2f}%" for c in columns if c not in ['symbol', 'Opportunity', 'Trade Action']}
+
+
+def apply_styler(df_live, selected_ex):
+    df_final, styler = legacy_path(df_live, selected_ex)
+    return styler.set_uuid("multidex").format(pct_formats(df_final.columns), na_rep="-")
+
+
+def kernel_styler(df_live, selected_ex):
+    hist = df_live.reindex(columns=[f"{e}_avg" for e in selected_ex]).to_numpy(dtype=float)
+    res = spread_kernel(df_live[selected_ex].to_numpy(dtype=float), selected_ex, hist=hist)
+    order = (-res.spread).argsort(kind='stable')
+    res = res.take(order)
+    df_final = df_live.iloc[order].copy()
+    df_final['APR Spread'] = res.spread
+    df_final['48h Pair Avg'] = res.pair_avg
+    df_final['Opportunity'] = opportunity_score(res.spread)
+    df_final['Trade Action'] = res.action
+    final_cols = ['symbol'] + selected_ex + ['APR Spread', '48h Pair Avg', 'Opportunity', 'Trade Action']
+    css = style_frame(df_final.index, final_cols, res, spread_col='APR Spread', spread_mask=res.alert, spread_css=ALERT_CSS)
+    return df_final[final_cols].style.set_uuid("multidex").apply(lambda _: css, axis=None).format(
+        pct_formats(final_cols), na_rep="-")
+
+
+def marshal(styler):
+    proto = ArrowData()
+    marshall_styler(proto, styler, "multidex")
+    proto.data = dataframe_util.convert_anything_to_arrow_bytes(styler.data)
+    return proto
+
+
+if __name__ == "__main__":
+    print(f"{'rows':>6} {'cells':>7} {'apply (ms)':>10} {'kernel Styler (ms)':>18} {'arrow (ms)':>10} {'build (ms)':>10}")
+    for n_symbols in [332, 1000, 3000, 10000]:
+        df_live, venues = make_frame(n_symbols, 5)
+        repeat = 3 if n_symbols <= 3000 else 1
+        t_apply, _ = best_of(lambda: marshal(apply_styler(df_live, venues)), repeat=1)
+        t_kernel, _ = best_of(lambda: marshal(kernel_styler(df_live, venues)), repeat=repeat)
+
+        t_build, table = best_of(lambda: multidex_table(df_live, venues, with_history=True), repeat=1)
+        t_arrow, _ = best_of(dataframe_util.convert_anything_to_arrow_bytes, table.arrow)
+
+        old = kernel_styler(df_live, venues)
+        old._compute()
+        pd.testing.assert_series_equal(table.frame['symbol'], old.data['symbol'])
+        marked = table.frame['Trade Action'].str.startswith(ALERT_MARK).to_numpy()
+        col = old.data.columns.get_loc('APR Spread')
+        assert (marked == np.array([bool(old.ctx.get((i, col))) for i in range(len(old.data))])).all()
+        print(f"{len(table.frame):>6} {table.frame.size:>7} {t_apply * 1e3:>10.1f} {t_kernel * 1e3:>18.1f} "
+              f"{t_arrow * 1e3:>10.2f} {t_build * 1e3:>10.1f}")
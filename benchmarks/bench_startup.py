@@ -0,0 +1,59 @@
+"""Dashboard cold start: time to the first table, with and without a saved snapshot.
+
+    python benchmarks/bench_startup.py
+
+Each run is a fresh Python process executing main.py headless (Streamlit's
+AppTest) against a local fake venue server whose slowest venue answers after
+`--delay` seconds, like a slow exchange. "no saved table" is a first deploy:
+the page waits for the first refresh. "saved table" reuses the Arrow file of
+the previous run (SNAPSHOT_DIR) and paints it before the refresh completes.
+Reports the time from script start to the first table (`dashboard.STARTUP`)
+and the whole first run (fresh data included, after the rerun).
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+CHILD = r"""
+import json, sys, time
+sys.path.insert(0, ROOT)
+from streamlit.testing.v1 import AppTest
+at = AppTest.from_file(ROOT + "/main.py", default_timeout=60)
+at.query_params["page"] = PAGE
+t0 = time.perf_counter()
+at.run()
+total = time.perf_counter() - t0
+import dashboard
+print(json.dumps({**dashboard.STARTUP, "total": total, "errors": [str(e.value) for e in at.exception]}))
+"""
+
+
+def run_child(page, env):
+    code = f"ROOT = {ROOT!r}\nPAGE = {page!r}\n" + CHILD
+    out = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, cwd=env["SNAPSHOT_DIR"])
+    lines = [line for line in out.stdout.splitlines() if line.startswith("{")]
+    if not lines: raise RuntimeError(out.stderr[-2000:])
+    return json.loads(lines[-1])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=2.0, help="latency of the slowest venue (seconds)")
+    args = parser.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from fake_venues import FakeVenueServer
+
+    with FakeVenueServer(delays={'Pacifica': args.delay, 'hip3:b0': args.delay}) as srv, tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "VENUE_BASE_URL": srv.base_url, "SNAPSHOT_DIR": tmp}
+        print(f"{'page':<10} {'scenario':<15} {'first table (s)':>15} {'source':>7} {'first run (s)':>13}")
+        for page in ["HIP-3", "Multi-DEX"]:
+            for scenario in ["no saved table", "saved table"]:
+                r = run_child(page, env)
+                if r["errors"]: raise RuntimeError(r["errors"])
+                print(f"{page:<10} {scenario:<15} {r['seconds']:>15.3f} {r['source']:>7} {r['total']:>13.3f}")
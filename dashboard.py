@@ -0,0 +1,211 @@
+"""Process-wide resources and shared helpers of the dashboard pages.
+
+Everything heavy is created lazily and once per server process: the fetch
+engine, fetchers and background poller are `st.cache_resource` loaders at
+module level, and the fetch stack (venues, hip3, pandas) is only imported
+when the poller starts; plotly, the history readers and the WebSocket client
+only when a page needs them. Page modules (`page_hip3`, `page_multidex`) import
+this module; main.py only imports the selected page.
+
+Progressive first paint: every table built from a fresh snapshot is also
+saved as an Arrow file under SNAPSHOT_DIR. While a cold process waits for its
+first refresh, `page_snapshot` renders that file at once, then waits for
+the fresh snapshot and reruns the page.
+
+The time from the start of a script run to its first table is recorded per
+page (`dashboard_first_table_seconds`, "cold" for the first table of the
+process) and the cold start is printed in the server log.
+"""
+import os
+import threading
+import time
+
+import streamlit as st
+
+import metrics
+
+# Published history store (written by recorder.py through the GitHub Action)
+HISTORY_URL = "https://raw.githubusercontent.com/Colin503/dashboard_funding_rates/main/funding_history"
+
+# Background refresh intervals (seconds)
+MAINNET_INTERVAL = 60
+HIP3_INTERVAL = 60
+
+# Prometheus-style fetch metrics on http://<host>:METRICS_PORT/metrics (disabled if unset)
+METRICS_PORT = os.environ.get("METRICS_PORT")
+
+# Live Hyperliquid funding over WebSocket (REST polling stays as the fallback)
+HL_STREAMING = os.environ.get("HL_STREAMING", "0") == "1"
+
+# Local fake venue server (`python fake_venues.py --serve`) instead of the exchanges
+VENUE_BASE_URL = os.environ.get("VENUE_BASE_URL")
+
+# Last rendered table of each page, shown instantly on a cold start
+SNAPSHOT_DIR = os.environ.get("SNAPSHOT_DIR", ".dashboard_cache")
+
+FIRST_TABLE = metrics.REGISTRY.histogram(
+    "dashboard_first_table_seconds", "Script run start to first table, per page and data source.",
+    ["page", "source", "run"],
+)
+# Table payloads are built once per snapshot version and selection, then shared by every session
+table_cache = st.cache_resource(max_entries=32)
+
+STARTUP = {}                # cold start: page, source ("saved" or "live") and seconds to the first table
+_startup_lock = threading.Lock()
+
+
+# ==============================================================================
+#                               PROCESS RESOURCES
+# ==============================================================================
+def _fake_urls():
+    if not VENUE_BASE_URL: return None
+    from fake_venues import PATHS
+    return {name: VENUE_BASE_URL.rstrip("/") + path for name, path in PATHS.items()}
+
+@st.cache_resource
+def get_fetch_engine():
+    # One engine per server process: pooled keep-alive connections survive reruns
+    from venues import FetchEngine, default_venues
+    ext_key = os.environ.get("EXT_API_KEY", "693ed8445baad0ae3b75c6d991bac4d9")
+    pac_key = os.environ.get("PACIFICA_API_KEY", "5h53egePzL1aM958CXWs9x4oY7FbnammiC7YiX7XErvD3TYk9L214kqP6j8GJ6wTQbnQzAk4Mbzxfo7aGKzrzP9s")
+    return FetchEngine(default_venues(ext_key, pac_key, timeout=3, urls=_fake_urls()), deadline=5)
+
+@st.cache_resource
+def get_venue_matrix():
+    # Shared symbol x venue table: only venues whose frame changed are rebuilt
+    from venues import VenueMatrix
+    return VenueMatrix()
+
+@st.cache_resource
+def get_hip3_fetcher():
+    from hip3 import HL_INFO_URL, Hip3Fetcher
+    url = _fake_urls()['Hyperliquid'] if VENUE_BASE_URL else HL_INFO_URL
+    return Hip3Fetcher(get_fetch_engine().session, url=url)
+
+@st.cache_resource
+def get_poller():
+    # Single background refresher per server process; sessions only read its store
+    from poller import Poller
+    # Built here, not by the first refresh: concurrent first imports in the poller threads can deadlock
+    engine = get_fetch_engine()
+    if METRICS_PORT: metrics.serve(int(METRICS_PORT))
+    poller = Poller()
+    mainnet, hip3 = engine.snapshot, get_hip3_fetcher().refresh
+    if HL_STREAMING:
+        from hl_stream import HyperliquidStream
+        stream = HyperliquidStream(poller.store, session=engine.session).start()
+        mainnet = lambda: stream.overlay_mainnet(engine.snapshot())
+        hip3 = lambda fetch=hip3: stream.overlay_hip3(fetch())
+    poller.add_job("mainnet", mainnet, MAINNET_INTERVAL)
+    poller.add_job("hip3", hip3, HIP3_INTERVAL)
+    return poller.start()
+
+
+# ==============================================================================
+#                               SNAPSHOTS
+# ==============================================================================
+def latest_snapshot(key):
+    """Latest published snapshot of `key`, None until the first refresh completed."""
+    snap = get_poller().store.latest(key)
+    if snap is None or (snap.version == 0 and snap.error is None): return None
+    if snap.version: st.caption(f"Data refreshed {snap.age:.0f}s ago")
+    return snap
+
+def wait_snapshot(key, timeout=10):
+    """Block until the first refresh of `key` (or an error, or `timeout`)."""
+    return get_poller().store.wait(key, timeout=timeout)
+
+def page_snapshot(key, table_key, page, loading):
+    """Latest snapshot of `key` for `page`, waiting for the first refresh.
+
+    On a cold process the page's last saved table (`table_key`) is shown
+    first and the page reruns once the fresh snapshot lands.
+    """
+    snap = latest_snapshot(key)
+    if snap is not None: return snap
+    if show_saved_table(table_key, page):
+        wait_snapshot(key)
+        st.rerun()
+    with st.spinner(loading):
+        wait_snapshot(key)
+    return latest_snapshot(key)
+
+def _saved_path(key):
+    return os.path.join(SNAPSHOT_DIR, f"{key}.arrow")
+
+def save_table(key, table):
+    """Keep the Arrow `table` as the page's last rendered table (atomic replace)."""
+    import pyarrow as pa
+    try:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        tmp = _saved_path(key) + ".tmp"
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        os.replace(tmp, _saved_path(key))
+    except OSError:
+        pass    # read-only deployment: no instant first paint, nothing else changes
+
+def show_saved_table(key, page):
+    """Render the last saved table of `key`; False when there is none."""
+    import pyarrow as pa
+    from tables import PCT_FORMAT
+    path = _saved_path(key)
+    try: table = pa.ipc.open_file(pa.memory_map(path)).read_all()
+    except (OSError, pa.ArrowInvalid): return False
+    # Every float column of the pages is an APR in %
+    config = {f.name: st.column_config.NumberColumn(f.name, format=PCT_FORMAT) for f in table.schema if pa.types.is_floating(f.type)}
+    st.caption(f"⏳ Last saved snapshot ({(time.time() - os.path.getmtime(path)) / 60:.0f} min old), refreshing...")
+    st.dataframe(table, column_config=config, use_container_width=True, hide_index=True)
+    table_shown(page, "saved")
+    return True
+
+
+# ==============================================================================
+#                               RENDERING
+# ==============================================================================
+def start_run(started):
+    """Called by main.py with the perf_counter() value taken at the top of the script."""
+    st.session_state["_run_started"] = started
+
+def table_shown(page, source):
+    started = st.session_state.pop("_run_started", None)
+    if started is None: return      # not the first table of this run
+    elapsed = time.perf_counter() - started
+    with _startup_lock:
+        cold = not STARTUP
+        if cold: STARTUP.update(page=page, source=source, seconds=elapsed)
+    FIRST_TABLE.observe(elapsed, page=page, source=source, run="cold" if cold else "warm")
+    if cold: print(f"First table ({page}, {source} data) {elapsed:.2f}s after script start")
+
+def render_table(payload, page, **kwargs):
+    st.dataframe(payload.arrow, column_config=payload.column_config, use_container_width=True, hide_index=True, **kwargs)
+    table_shown(page, "live")
+
+def render_data_health(health, interval):
+    # Last fetch of every source: a timeout no longer looks like an empty market
+    import pandas as pd
+    rows = []
+    for name, h in health.items():
+        stat, staleness = h['stat'], h['staleness']
+        if stat is None: status = "⚪ Pending"
+        elif stat.error: status = f"🔴 {stat.error}"
+        elif staleness is not None and staleness > 3 * interval: status = "🟠 Stale"
+        else: status = "🟢 OK"
+        rows.append({
+            "Source": name, "Status": status,
+            "Staleness (s)": staleness,
+            "Latency (ms)": stat.latency * 1000 if stat and stat.latency is not None else None,
+            "Size (KB)": stat.bytes / 1024 if stat and not stat.error else None,
+            "Parse (ms)": stat.parse_time * 1000 if stat and not stat.error else None,
+            "Rows": stat.rows if stat and not stat.error else None,
+            "Reused": {"304": "304", "hash": "same body"}.get(stat.cache, "") if stat else "",
+        })
+    with st.expander("🩺 Data Health", expanded=any(not r["Status"].startswith("🟢") for r in rows)):
+        if not rows:
+            st.caption("No fetch completed yet.")
+            return
+        st.dataframe(
+            pd.DataFrame(rows), use_container_width=True, hide_index=True,
+            column_config={c: st.column_config.NumberColumn(c, format="%.0f") for c in ["Staleness (s)", "Latency (ms)", "Parse (ms)", "Rows"]}
+            | {"Size (KB)": st.column_config.NumberColumn("Size (KB)", format="%.1f")},
+        )
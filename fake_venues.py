@@ -0,0 +1,371 @@
+"""Local fake-venue HTTP server, to run the fetch engine offline.
+
+Every venue is served under its own path with payloads shaped like the real
+APIs (the Hyperliquid path also answers `meta` and the HIP-3 `perpDexs` and
+per-dex calls; `MockHyperliquidWS` stands in for the Hyperliquid WebSocket).
+Per-venue latency and failures can be injected, ETags can be turned on, and
+the server counts TCP connections so keep-alive reuse can be checked::
+
+    with FakeVenueServer(delays={'Lighter': 0.5}) as srv:
+        engine = FetchEngine(default_venues(urls=srv.urls()))
+        frames = engine.snapshot()
+
+Recorded venue responses replace the synthetic payloads for reproducible
+offline runs: `capture` saves the raw bodies of the live venues and HIP-3
+dexes as JSON fixtures, `load_fixtures` reads them back and `scale_payloads`
+multiplies their symbol count (1x, 10x, 100x benchmarks)::
+
+    python fake_venues.py --capture fixtures/
+    python fake_venues.py --replay fixtures/ --scale 10 --delay Lighter=0.3 --fail Extended=503
+
+Run `python fake_venues.py` for a quick self-check of the engine.
+"""
+import argparse
+import copy
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+PATHS = {
+    'Variational': '/variational/metadata/stats',
+    'Hyperliquid': '/hyperliquid/info',
+    'Lighter': '/lighter/api/v1/funding-rates',
+    'Extended': '/extended/api/v1/info/markets',
+    'Pacifica': '/pacifica/api/v1/info',
+}
+
+
+def sample_payloads(n_symbols=200, seed=0, n_builders=7):
+    """Synthetic venue responses over a shared symbol universe.
+
+    'hip3' holds one metaAndAssetCtxs response per HIP-3 builder dex.
+    """
+    rng = random.Random(seed)
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    rate = lambda: rng.uniform(-0.0005, 0.0005)
+    pick = lambda: [s for s in symbols if rng.random() < 0.8]
+    return {
+        'Variational': {"listings": [{"ticker": s, "funding_rate": str(rate() * 100)} for s in pick()]},
+        'Hyperliquid': (lambda syms: [
+            {"universe": [{"name": s} for s in syms]},
+            [{"funding": str(rate() / 8)} for _ in syms],
+        ])(pick()),
+        'Lighter': {"funding_rates": [{"symbol": s, "rate": str(rate())} for s in pick()]},
+        'Extended': {"data": [{"name": f"{s}-USD", "marketStats": {"fundingRate": str(rate() / 8)}} for s in pick()]},
+        'Pacifica': {"data": [{"symbol": f"{s}-USD", "next_funding_rate": str(rate() / 8)} for s in pick()]},
+        'hip3': {
+            f"b{j}": (lambda syms, dex: [
+                {"universe": [{"name": f"{dex}:{s}"} for s in syms]},
+                [{"funding": str(rate() / 8)} for _ in syms],
+            ])(pick()[:n_symbols // 4], f"b{j}")
+            for j in range(n_builders)
+        },
+    }
+
+
+# --- Recorded fixtures ---------------------------------------------------------
+# Market rows of each venue payload: (rows accessor, ticker field)
+_ROWS = {
+    'Variational': (lambda p: p['listings'], 'ticker'),
+    'Lighter': (lambda p: p['funding_rates'], 'symbol'),
+    'Extended': (lambda p: p['data'], 'name'),
+    'Pacifica': (lambda p: p['data'], 'symbol'),
+}
+
+
+def capture(root, ext_api_key=None, pac_api_key=None, timeout=10.0, session=None):
+    """Save the raw responses of the live venues and HIP-3 dexes under `root`.
+
+    Bodies are written as received: `<venue>.json` per venue, `hip3/<dex>.json`
+    per builder dex. Returns {file name: bytes written, or the error class}.
+    """
+    import requests
+    from hip3 import HL_INFO_URL
+    from venues import default_venues, error_class
+
+    session = session or requests.Session()
+    os.makedirs(os.path.join(root, "hip3"), exist_ok=True)
+    jobs = [(f"{v.name}.json", v.method, v.url, v.headers, v.payload)
+            for v in default_venues(ext_api_key, pac_api_key, timeout)]
+    try:
+        dexs = session.post(HL_INFO_URL, json={"type": "perpDexs"}, timeout=timeout).json()
+        jobs += [(os.path.join("hip3", f"{d['name']}.json"), "POST", HL_INFO_URL, {}, {"type": "metaAndAssetCtxs", "dex": d['name']})
+                 for d in dexs if d and d.get('name') and d['name'] != "test"]
+    except Exception as e:
+        print(f"perpDexs: {error_class(e)}")
+
+    saved = {}
+    for name, method, url, headers, payload in jobs:
+        try:
+            r = session.request(method, url, headers=headers, json=payload, timeout=timeout)
+            r.raise_for_status()
+            r.json()
+        except Exception as e:
+            saved[name] = error_class(e)
+            continue
+        with open(os.path.join(root, name), "wb") as f: f.write(r.content)
+        saved[name] = len(r.content)
+    return saved
+
+
+def load_fixtures(root):
+    """FakeVenueServer payloads from a `capture` directory."""
+    payloads = {}
+    for name in PATHS:
+        path = os.path.join(root, f"{name}.json")
+        if os.path.exists(path):
+            with open(path) as f: payloads[name] = json.load(f)
+    hip3_dir = os.path.join(root, "hip3")
+    if os.path.isdir(hip3_dir):
+        payloads['hip3'] = {}
+        for file in sorted(os.listdir(hip3_dir)):
+            if file.endswith(".json"):
+                with open(os.path.join(hip3_dir, file)) as f: payloads['hip3'][file[:-5]] = json.load(f)
+    return payloads
+
+
+def _rename(ticker, i):
+    # "BTC-USD" -> "BTCX1-USD", "xyz:TSLA" -> "xyz:TSLAX1": same venue format, new canonical symbol
+    dex, colon, rest = ticker.rpartition(':')
+    base, dash, quote = rest.partition('-')
+    return f"{dex}{colon}{base}X{i}{dash}{quote}"
+
+
+def _scale_meta_ctxs(payload, factor):
+    # metaAndAssetCtxs: [{"universe": [...]}, [ctx, ...]] in the same order
+    meta, ctxs = payload[0], payload[1]
+    universe, ctxs = list(meta['universe']), list(ctxs)
+    meta['universe'] = universe + [{**m, 'name': _rename(m['name'], i)} for i in range(1, factor) for m in universe]
+    payload[1] = ctxs + [dict(c) for _ in range(1, factor) for c in ctxs]
+
+
+def scale_payloads(payloads, factor):
+    """Copy of `payloads` with `factor` times the markets of every venue and dex."""
+    out = copy.deepcopy(payloads)
+    if factor <= 1: return out
+    for name, (rows_of, key) in _ROWS.items():
+        if name not in out: continue
+        rows = rows_of(out[name])
+        rows[:] = rows + [{**r, key: _rename(r[key], i)} for i in range(1, factor) for r in list(rows)]
+    if 'Hyperliquid' in out: _scale_meta_ctxs(out['Hyperliquid'], factor)
+    for payload in out.get('hip3', {}).values(): _scale_meta_ctxs(payload, factor)
+    return out
+
+
+class _QuietServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        pass  # clients giving up on an injected delay close the socket early
+
+
+class FakeVenueServer:
+    def __init__(self, payloads=None, delays=None, failures=None, etags=False, host="127.0.0.1", port=0):
+        self.payloads = payloads if payloads is not None else sample_payloads()
+        self.etags = etags      # send ETags and answer If-None-Match with 304
+        self.delays = dict(delays or {})
+        self.failures = dict(failures or {})  # venue (or "hip3:<dex>") -> HTTP status to return
+        self.connections = 0
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = _QuietServer((host, port), self._handler())
+        self._thread = None
+
+    def _handler(self):
+        server = self
+        by_path = {path: name for name, path in PATHS.items()}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def setup(self):
+                super().setup()
+                with server._lock: server.connections += 1
+
+            def log_message(self, *args):
+                pass
+
+            def _serve(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                request = json.loads(self.rfile.read(length) or b"null") if length else None
+                name = by_path.get(self.path.split("?")[0])
+                payload = server.payloads.get(name)
+                # Hyperliquid info endpoint also serves the HIP-3 builder dexes
+                if name == 'Hyperliquid' and isinstance(request, dict):
+                    hip3 = server.payloads.get('hip3', {})
+                    if request.get("type") == "perpDexs":
+                        payload = [None] + [{"name": dex} for dex in hip3]
+                    elif request.get("dex"):
+                        name = f"hip3:{request['dex']}"
+                        payload = hip3.get(request["dex"])
+                    if request.get("type") == "meta" and payload:
+                        payload = payload[0]
+                with server._lock: server.requests += 1
+                time.sleep(server.delays.get(name, 0))
+                status = 404 if name is None else server.failures.get(name, 200)
+                body = json.dumps(payload if status == 200 else {"error": status}).encode()
+                etag = f'"{hashlib.md5(body).hexdigest()}"' if server.etags and status == 200 else None
+                if etag and self.headers.get("If-None-Match") == etag: status, body = 304, b""
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                if etag: self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            do_GET = _serve
+            do_POST = _serve
+
+        return Handler
+
+    @property
+    def base_url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self):
+        return {name: self.base_url + path for name, path in PATHS.items()}
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+class MockHyperliquidWS:
+    """Local stand-in for the Hyperliquid WebSocket (`activeAssetCtx` channel).
+
+    Tests push context updates with `push(coin, funding)` and simulate an
+    outage with `disconnect_all()`. Runs its own event loop in a thread.
+    """
+
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host, self.port = host, port
+        self.subscriptions = {}     # connection -> set of coins
+        self.connections = 0
+        self._loop = None
+        self._server = None
+        self._ready = threading.Event()
+
+    @property
+    def url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    async def _handler(self, ws, path=None):
+        self.connections += 1
+        self.subscriptions[ws] = set()
+        try:
+            async for raw in ws:
+                msg = json.loads(raw)
+                if msg.get("method") == "subscribe":
+                    sub = msg["subscription"]
+                    self.subscriptions[ws].add(sub["coin"])
+                    await ws.send(json.dumps({"channel": "subscriptionResponse", "data": msg}))
+        except Exception:
+            pass
+        finally:
+            self.subscriptions.pop(ws, None)
+
+    async def _serve(self):
+        import websockets
+        self._server = await websockets.serve(self._handler, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        await self._server.wait_closed()
+
+    def start(self):
+        import asyncio
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_until_complete, args=(self._serve(),), daemon=True).start()
+        self._ready.wait(5)
+        return self
+
+    def _call(self, coro):
+        import asyncio
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(5)
+
+    def push(self, coin, funding):
+        msg = json.dumps({"channel": "activeAssetCtx", "data": {"coin": coin, "ctx": {"funding": str(funding)}}})
+
+        async def send():
+            for ws, coins in list(self.subscriptions.items()):
+                if coin in coins: await ws.send(msg)
+        self._call(send())
+
+    def disconnect_all(self):
+        async def close():
+            for ws in list(self.subscriptions): await ws.close()
+        self._call(close())
+
+    def stop(self):
+        async def shutdown():
+            self._server.close()
+        self._call(shutdown())
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def _pairs(items, cast):
+    return {k: cast(v) for k, v in (item.split("=", 1) for item in items or [])}
+
+
+def _self_check():
+    from venues import FetchEngine, default_venues
+
+    with FakeVenueServer(delays={'Lighter': 0.3, 'Pacifica': 2.0}, failures={'Extended': 500}) as srv:
+        engine = FetchEngine(default_venues(urls=srv.urls(), timeout=1.0), deadline=1.5)
+        for i in range(3):
+            t0 = time.perf_counter()
+            frames = engine.snapshot()
+            rows = {name: len(df) for name, df in frames.items()}
+            print(f"run {i}: {time.perf_counter() - t0:.3f}s rows={rows}")
+        print(f"requests={srv.requests} tcp_connections={srv.connections}")
+        engine.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake venue server: engine self-check, fixture capture and replay.")
+    parser.add_argument("--capture", metavar="DIR", help="save the live venue responses to DIR")
+    parser.add_argument("--replay", metavar="DIR", help="serve the fixtures of DIR (synthetic payloads with --serve)")
+    parser.add_argument("--serve", action="store_true", help="serve synthetic payloads")
+    parser.add_argument("--scale", type=int, default=1, help="multiply the symbol count of the served payloads")
+    parser.add_argument("--delay", nargs="*", metavar="VENUE=SECONDS", help="injected latency, e.g. Lighter=0.3 hip3:xyz=1")
+    parser.add_argument("--fail", nargs="*", metavar="VENUE=STATUS", help="injected failure, e.g. Extended=503")
+    parser.add_argument("--etags", action="store_true", help="send ETags and answer 304")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    if args.capture:
+        saved = capture(args.capture, os.environ.get("EXT_API_KEY"), os.environ.get("PACIFICA_API_KEY"))
+        for name, size in saved.items():
+            print(f"{name}: {size if isinstance(size, str) else f'{size / 1024:.0f} KB'}")
+    elif args.replay or args.serve:
+        payloads = load_fixtures(args.replay) if args.replay else sample_payloads()
+        srv = FakeVenueServer(scale_payloads(payloads, args.scale), _pairs(args.delay, float), _pairs(args.fail, int),
+                              etags=args.etags, port=args.port).start()
+        for name, url in srv.urls().items(): print(f"{name:<12} {url}")
+        print("Ctrl+C to stop")
+        try:
+            while True: time.sleep(3600)
+        except KeyboardInterrupt:
+            srv.stop()
+    else:
+        _self_check()
@@ -0,0 +1,193 @@
+"""HIP-3 builder dexes on Hyperliquid: fetch every builder's funding and pivot
+it into a symbol x builder APR matrix.
+
+`Hip3Fetcher` fans out one `metaAndAssetCtxs` call per builder dex:
+
+- every call takes its weight from `venues.HL_RATE_LIMITER`, the token
+  bucket sized to Hyperliquid's REST limit that every Hyperliquid caller of
+  the process shares (mainnet fetch, HIP-3 fan-out, stream universe);
+- concurrency adapts (AIMD): it grows while calls succeed and halves on a
+  429, 5xx or timeout; failed calls are retried with jittered backoff;
+- the dex list is cached (`dex_ttl`), so a refresh is one call per dex;
+- each dex refreshes independently under a deadline: a slow builder keeps
+  running in the background and the matrix uses its last good rows.
+
+Each dex refresh is recorded like a mainnet venue fetch (`FetchStat`, metrics
+under the "hip3:<dex>" venue label), see `health()`.
+"""
+import concurrent.futures
+import random
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import requests
+
+from metrics import VENUE_METRICS
+from symbols import SYMBOLS
+from venues import HL_RATE_LIMITER, INFO_WEIGHT, FetchStat, error_class
+
+HL_INFO_URL = "https://api.hyperliquid.xyz/info"
+
+# Builder Name Mapping
+BUILDER_MAPPING = {
+    "km": "Kinetiq Markets", "xyz": "Trade[xyz]", "flx": "Felix",
+    "hyna": "HyENA", "vntl": "Ventuals", "cash": "Dreamcash",
+    "abcd": "ABCD"
+}
+
+
+def safe_float(value):
+    if value is None: return 0.0
+    try: return float(value)
+    except: return 0.0
+
+def get_underlying(symbol):
+    return SYMBOLS.canonical(symbol, "HIP-3")
+
+
+# ==============================================================================
+#                               RATE / CONCURRENCY CONTROL
+# ==============================================================================
+class AdaptiveLimiter:
+    """Concurrency limit with additive increase / multiplicative decrease."""
+
+    def __init__(self, initial=4, minimum=1, maximum=16):
+        self.limit, self.minimum, self.maximum = float(initial), minimum, maximum
+        self._active = 0
+        self._cond = threading.Condition()
+
+    def __enter__(self):
+        with self._cond:
+            self._cond.wait_for(lambda: self._active < int(self.limit))
+            self._active += 1
+        return self
+
+    def __exit__(self, *exc):
+        with self._cond:
+            self._active -= 1
+            self._cond.notify_all()
+
+    def on_success(self):
+        with self._cond:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+    def on_throttle(self):
+        with self._cond:
+            self.limit = max(self.minimum, self.limit / 2)
+
+
+class _Retryable(Exception):
+    pass
+
+
+# ==============================================================================
+#                               FETCHER
+# ==============================================================================
+class Hip3Fetcher:
+    def __init__(self, session=None, url=HL_INFO_URL, bucket=None, limiter=None, deadline=8.0,
+                 timeout=10, retries=2, backoff=0.25, dex_ttl=600):
+        self.session = session or requests.Session()
+        self.url = url
+        self.bucket = bucket or HL_RATE_LIMITER
+        self.limiter = limiter or AdaptiveLimiter()
+        self.deadline, self.timeout, self.retries, self.backoff, self.dex_ttl = deadline, timeout, retries, backoff, dex_ttl
+        self.errors = {}            # dex -> last error (cleared on success)
+        self.stats = {}             # dex -> FetchStat of the last refresh
+        self._dexs = ([], 0.0)      # (names, fetched_at)
+        self._rows = {}             # dex -> (DataFrame[Symbol, Funding APR], fetched_at)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=self.limiter.maximum, thread_name_prefix="hip3")
+
+    def _post(self, payload, stat=None):
+        for attempt in range(self.retries + 1):
+            self.bucket.acquire(INFO_WEIGHT)
+            try:
+                with self.limiter:
+                    r = self.session.post(self.url, json=payload, timeout=self.timeout)
+                if r.status_code == 429 or r.status_code >= 500: raise _Retryable(f"HTTP {r.status_code}")
+                r.raise_for_status()
+                self.limiter.on_success()
+                if stat is not None: stat.bytes = len(r.content)
+                return r.json()
+            except (_Retryable, requests.ConnectionError, requests.Timeout):
+                self.limiter.on_throttle()
+                if attempt == self.retries: raise
+                time.sleep(random.uniform(0, self.backoff * 2 ** attempt))  # full jitter
+
+    def dexs(self):
+        names, fetched_at = self._dexs
+        if names and time.time() - fetched_at < self.dex_ttl: return names
+        try:
+            resp = self._post({"type": "perpDexs"})
+        except Exception as e:
+            stat = FetchStat("hip3:perpDexs", error=str(e) if isinstance(e, _Retryable) else error_class(e), finished_at=time.time())
+            with self._lock: self.stats["perpDexs"] = stat
+            VENUE_METRICS.record(stat)
+            if names: return names      # keep the cached list on a failed refresh
+            raise
+        with self._lock: self.stats.pop("perpDexs", None)
+        names = [d['name'] for d in resp if d and d.get('name') and d['name'] != "test"]
+        self._dexs = (names, time.time())
+        return names
+
+    def _refresh_dex(self, dex):
+        stat = FetchStat(f"hip3:{dex}", started_at=time.time())
+        t0 = time.perf_counter()
+        try:
+            r = self._post({"type": "metaAndAssetCtxs", "dex": dex}, stat)
+            stat.latency = time.perf_counter() - t0
+            t1 = time.perf_counter()
+            if not r or len(r) < 2: raise ValueError("empty metaAndAssetCtxs response")
+            symbols, context = [get_underlying(a['name']) for a in r[0]['universe']], r[1]
+            funding = np.array([safe_float(context[i].get('funding')) if i < len(context) else 0.0 for i in range(len(symbols))])
+            rows = pd.DataFrame({"Symbol": symbols, "Funding APR": funding * 24 * 365 * 100})
+            stat.parse_time, stat.rows = time.perf_counter() - t1, len(rows)
+            with self._lock:
+                self._rows[dex] = (rows, time.time())
+                self.errors.pop(dex, None)
+        except Exception as e:
+            stat.error = str(e) if isinstance(e, _Retryable) else error_class(e)   # "HTTP 429" etc.
+            if stat.latency is None: stat.latency = time.perf_counter() - t0
+            with self._lock: self.errors[dex] = repr(e)
+        stat.finished_at = time.time()
+        with self._lock: self.stats[dex] = stat
+        VENUE_METRICS.record(stat)
+
+    def refresh(self):
+        """Refresh every builder (bounded by `deadline`) and return the APR matrix."""
+        dexs = self.dexs()
+        with self._lock:
+            for dex in dexs:
+                fut = self._inflight.get(dex)
+                if fut is None or fut.done():
+                    self._inflight[dex] = self._executor.submit(self._refresh_dex, dex)
+            pending = [self._inflight[d] for d in dexs]
+        concurrent.futures.wait(pending, timeout=self.deadline)
+        return self.matrix(dexs)
+
+    def matrix(self, dexs=None):
+        with self._lock:
+            frames = [rows.assign(Builder=dex) for dex, (rows, _) in self._rows.items() if dexs is None or dex in dexs]
+        if not frames: return pd.DataFrame()
+        df = pd.concat(frames, ignore_index=True)
+        df_pivot = df.pivot_table(index='Symbol', columns='Builder', values='Funding APR', aggfunc='mean')
+        return df_pivot.rename(columns=BUILDER_MAPPING)
+
+    def ages(self):
+        """Seconds since each builder's last successful refresh."""
+        now = time.time()
+        with self._lock:
+            return {dex: now - fetched_at for dex, (_, fetched_at) in self._rows.items()}
+
+    def health(self):
+        """Same shape as `FetchEngine.health()`, keyed by builder name."""
+        ages = self.ages()
+        with self._lock: stats = dict(self.stats)
+        return {
+            BUILDER_MAPPING.get(dex, dex): {'stat': stats.get(dex), 'staleness': ages.get(dex)}
+            for dex in sorted(set(stats) | set(ages))
+        }
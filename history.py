@@ -0,0 +1,440 @@
+"""Append-only funding history store, partitioned by day.
+
+Layout on disk::
+
+    funding_history/
+        _manifest.json                      # relative paths and sizes of every data file, schema marker
+        date=2026-08-22/
+            snap-20260822T231500000000.parquet   # one small file per recorder run
+        date=2026-08-21/
+            part-compacted.parquet          # closed days are merged into one file
+
+A recorder run only writes its own snapshot file, compacts days that are
+closed (once each) and drops partitions older than the retention window, so
+its cost does not depend on how much history exists. Readers see a single
+logical dataset through `read_history` (local) or `query_remote` (published
+store, through the manifest).
+
+Storage schema (`SCHEMA`) is long: one (symbol, venue, ts, rate) row per quoted
+rate, so a venue that does not list a symbol costs nothing. Symbols and venues
+are dictionary-encoded, timestamps are UTC milliseconds (int64), rates are
+float32, and rows are sorted by (symbol, venue, ts) so row-group statistics
+let readers skip everything but the symbols they ask for. `read_history`
+returns the familiar wide frame (symbol, <venue>..., timestamp) by default.
+"""
+import concurrent.futures
+import datetime
+import glob
+import io
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+import requests
+from requests.adapters import HTTPAdapter
+
+from venues import EXCHANGES
+
+HISTORY_DIR = "funding_history"
+LEGACY_FILE = "funding_history.parquet"
+RETENTION_DAYS = 7
+
+MANIFEST_NAME = "_manifest.json"
+MANIFEST_SCHEMA = "long"        # manifest marker: every data file is in `SCHEMA`
+COMPACTED_NAME = "part-compacted.parquet"
+SNAPSHOT_PREFIX = "snap-"
+
+VENUE_COLUMNS = EXCHANGES
+
+# symbol/venue are dictionary-encoded in the Parquet pages (`use_dictionary`)
+# but kept as plain strings in the Arrow schema: pyarrow only prunes row
+# groups from column statistics for non-dictionary Arrow types.
+SCHEMA = pa.schema([
+    ('symbol', pa.string()),
+    ('venue', pa.string()),
+    ('ts', pa.timestamp('ms', tz='UTC')),
+    ('rate', pa.float32()),
+])
+SORT_KEYS = ['symbol', 'venue', 'ts']
+ROW_GROUP_SIZE = 16 * 1024
+
+
+# ==============================================================================
+#                               LAYOUT HELPERS
+# ==============================================================================
+def _partition_dir(root, day):
+    return os.path.join(root, f"date={day.isoformat()}")
+
+def list_partitions(root=HISTORY_DIR):
+    """Sorted list of the days that have a partition directory."""
+    days = []
+    for path in glob.glob(os.path.join(root, "date=*")):
+        try: days.append(datetime.date.fromisoformat(os.path.basename(path)[len("date="):]))
+        except ValueError: continue
+    return sorted(days)
+
+def _data_files(root):
+    return sorted(glob.glob(os.path.join(root, "date=*", "*.parquet")))
+
+def to_utc(values):
+    """Naive timestamps (legacy `datetime.now()` on the UTC runner) are taken as UTC."""
+    ts = pd.to_datetime(values)
+    if isinstance(ts, pd.Series):
+        return ts.dt.tz_localize('UTC') if ts.dt.tz is None else ts.dt.tz_convert('UTC')
+    return ts.tz_localize('UTC') if ts.tz is None else ts.tz_convert('UTC')
+
+def to_long(df):
+    """Wide frame (symbol, <venue>..., timestamp) -> sorted long (symbol, venue, ts, rate)."""
+    venues = [v for v in VENUE_COLUMNS if v in df.columns]
+    long = df.melt(id_vars=['symbol', 'timestamp'], value_vars=venues, var_name='venue', value_name='rate')
+    long['rate'] = pd.to_numeric(long['rate'], errors='coerce')
+    long = long.dropna(subset=['rate', 'symbol'])
+    long['ts'] = to_utc(long.pop('timestamp')).astype('datetime64[ms, UTC]')
+    # Duplicate tickers (e.g. outer-merge fan-out) collapse to their mean, sorted by key
+    return long.groupby(SORT_KEYS, as_index=False, sort=True)['rate'].mean()
+
+def to_wide(long):
+    """Long rows back to the wide (symbol, <venue>..., timestamp) frame."""
+    if long.empty: return pd.DataFrame(columns=['symbol'] + VENUE_COLUMNS + ['timestamp'])
+    wide = long.pivot_table(index=['ts', 'symbol'], columns='venue', values='rate', observed=True)
+    wide = wide.reindex(columns=[v for v in VENUE_COLUMNS if v in wide.columns]).astype('float64')
+    wide.columns.name = None
+    return wide.reset_index().rename(columns={'ts': 'timestamp'})[['symbol'] + list(wide.columns) + ['timestamp']]
+
+def _to_table(long):
+    long = long[SCHEMA.names].sort_values(SORT_KEYS, kind='stable')
+    long = long.astype({'symbol': str, 'venue': str, 'rate': 'float32'})
+    long['ts'] = to_utc(long['ts']).astype('datetime64[ms, UTC]')
+    return pa.Table.from_pandas(long, schema=SCHEMA, preserve_index=False)
+
+def _empty_long():
+    return _to_table(pd.DataFrame(columns=SCHEMA.names)).to_pandas()
+
+def _write_atomic(table, path):
+    tmp = path + ".tmp"
+    pq.write_table(
+        table, tmp, compression='zstd', row_group_size=ROW_GROUP_SIZE,
+        use_dictionary=['symbol', 'venue'], write_statistics=True,
+        sorting_columns=pq.SortingColumn.from_ordering(SCHEMA, [(k, 'ascending') for k in SORT_KEYS]),
+    )
+    os.replace(tmp, path)
+
+def _read_file(path):
+    return pq.read_table(path, schema=SCHEMA).to_pandas()
+
+
+# ==============================================================================
+#                               WRITE PATH
+# ==============================================================================
+def append_batch(frames, root=HISTORY_DIR):
+    """Write buffered wide snapshots as one file per (UTC) day partition.
+
+    Files are named after their first timestamp, so a batch sorts (and is
+    compacted) like the single snapshots it replaces.
+    """
+    long = to_long(pd.concat(frames, ignore_index=True))
+    paths = []
+    for day, rows in long.groupby(long['ts'].dt.date, sort=True):
+        part = _partition_dir(root, day)
+        os.makedirs(part, exist_ok=True)
+        path = os.path.join(part, f"{SNAPSHOT_PREFIX}{rows['ts'].min():%Y%m%dT%H%M%S%f}.parquet")
+        _write_atomic(_to_table(rows), path)
+        paths.append(path)
+    return paths
+
+def compact_partition(day, root=HISTORY_DIR):
+    """Merge every snapshot file of `day` into the partition's compacted file."""
+    part = _partition_dir(root, day)
+    snaps = sorted(glob.glob(os.path.join(part, f"{SNAPSHOT_PREFIX}*.parquet")))
+    if not snaps: return 0
+    compacted = os.path.join(part, COMPACTED_NAME)
+    files = ([compacted] if os.path.exists(compacted) else []) + snaps
+    _write_atomic(_to_table(pd.concat([_read_file(f) for f in files], ignore_index=True)), compacted)
+    for f in snaps: os.remove(f)
+    return len(snaps)
+
+def compact(root=HISTORY_DIR, today=None):
+    """Compact closed days only: the current day keeps receiving snapshots."""
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    return sum(compact_partition(day, root) for day in list_partitions(root) if day < today)
+
+def apply_retention(root=HISTORY_DIR, days=RETENTION_DAYS, today=None):
+    """Drop whole partitions older than the retention window (today + `days - 1` previous days)."""
+    today = today or datetime.datetime.now(datetime.timezone.utc).date()
+    cutoff = today - datetime.timedelta(days=days - 1)
+    dropped = [day for day in list_partitions(root) if day < cutoff]
+    for day in dropped: shutil.rmtree(_partition_dir(root, day))
+    return dropped
+
+def write_manifest(root=HISTORY_DIR):
+    """List the data files so remote readers (raw GitHub URLs) can find them."""
+    paths = _data_files(root)
+    files = [os.path.relpath(f, root).replace(os.sep, "/") for f in paths]
+    sizes = {rel: os.path.getsize(f) for rel, f in zip(files, paths)}
+    with open(os.path.join(root, MANIFEST_NAME), "w") as fh:
+        json.dump({"schema": MANIFEST_SCHEMA, "files": files, "sizes": sizes}, fh, indent=0)
+    return files
+
+def read_manifest(root=HISTORY_DIR):
+    path = os.path.join(root, MANIFEST_NAME)
+    if not os.path.exists(path): return {}
+    with open(path) as fh: return json.load(fh)
+
+def migrate_legacy(legacy_path=LEGACY_FILE, root=HISTORY_DIR):
+    """One-off import of the old single-file history into day partitions."""
+    if not os.path.exists(legacy_path) or list_partitions(root): return False
+    long = to_long(pd.read_parquet(legacy_path))
+    for day, df_day in long.groupby(long['ts'].dt.date):
+        part = _partition_dir(root, day)
+        os.makedirs(part, exist_ok=True)
+        _write_atomic(_to_table(df_day), os.path.join(part, COMPACTED_NAME))
+    os.remove(legacy_path)
+    return True
+
+def needs_wide_migration(root=HISTORY_DIR):
+    """False once a manifest written after the long-schema migration exists."""
+    return read_manifest(root).get("schema") != MANIFEST_SCHEMA
+
+def migrate_wide_files(root=HISTORY_DIR):
+    """Rewrite data files still in the former wide schema into `SCHEMA`."""
+    migrated = []
+    for path in _data_files(root):
+        if 'venue' in pq.read_schema(path).names: continue
+        _write_atomic(_to_table(to_long(pd.read_parquet(path))), path)
+        migrated.append(path)
+    return migrated
+
+
+# ==============================================================================
+#                               READ PATH
+# ==============================================================================
+def open_dataset(root=HISTORY_DIR):
+    # Files starting with "_" (the manifest) are ignored by pyarrow by default.
+    return ds.dataset(root, format="parquet", partitioning="hive", schema=SCHEMA)
+
+def read_history(root=HISTORY_DIR, wide=True):
+    long = open_dataset(root).to_table().to_pandas() if list_partitions(root) else _empty_long()
+    return to_wide(long) if wide else long
+
+
+# ==============================================================================
+#                               QUERY API
+# ==============================================================================
+BARS = {'1h': '1h', '8h': '8h', '1d': '1D'}
+RANGE_READ_MIN_BYTES = 1024 * 1024
+REMOTE_WORKERS = 8              # files fetched at once by `query_remote`
+
+def _ts(value):
+    return None if value is None else to_utc(pd.Timestamp(value))
+
+def _as_list(value):
+    if value is None: return None
+    return [value] if isinstance(value, str) else list(value)
+
+def _filter(symbols, venues, start, end):
+    parts = []
+    if symbols: parts.append(ds.field('symbol').isin(symbols))
+    if venues: parts.append(ds.field('venue').isin(venues))
+    if start is not None: parts.append(ds.field('ts') >= pa.scalar(start, SCHEMA.field('ts').type))
+    if end is not None: parts.append(ds.field('ts') < pa.scalar(end, SCHEMA.field('ts').type))
+    expr = None
+    for p in parts: expr = p if expr is None else expr & p
+    return expr
+
+def _day_of(rel_path):
+    return datetime.date.fromisoformat(rel_path.split("/")[0][len("date="):])
+
+def _day_selected(day, start, end):
+    # Partition pruning: a day partition holds [day 00:00, day+1 00:00) UTC
+    return (start is None or day >= start.date()) and (end is None or day <= end.date())
+
+def _columns(columns, bar):
+    return SCHEMA.names if bar else (columns or SCHEMA.names)
+
+def _finish(table, columns, bar):
+    df = table.to_pandas() if table is not None else _empty_long()[columns]
+    return resample(df, bar) if bar else df
+
+CATEGORICAL = ('symbol', 'venue')
+_NUMPY_TYPES = {'ts': np.int64, 'rate': np.float32}     # ts as UTC milliseconds
+
+def _categorical_frame(dataset, columns, expr):
+    """Filtered rows with symbol / venue as categoricals, filled batch by batch
+    into preallocated arrays: the full-length string columns never exist."""
+    n = dataset.count_rows(filter=expr)
+    out = {c: np.empty(n, dtype=np.int32 if c in CATEGORICAL else _NUMPY_TYPES[c]) for c in columns}
+    names = {c: {} for c in columns if c in CATEGORICAL}     # value -> code, in order of appearance
+    i = 0
+    for batch in dataset.to_batches(columns=columns, filter=expr):
+        j = i + batch.num_rows
+        for c, array in zip(batch.schema.names, batch.columns):
+            if c in CATEGORICAL:
+                encoded = pc.dictionary_encode(array)
+                codes = np.array([names[c].setdefault(v, len(names[c])) for v in encoded.dictionary.to_pylist()], dtype=np.int32)
+                out[c][i:j] = codes[encoded.indices.to_numpy()]
+            else:
+                out[c][i:j] = array.to_numpy().view(out[c].dtype)
+        i = j
+    frame = {}
+    for c in columns:
+        if c in CATEGORICAL: frame[c] = pd.Categorical.from_codes(out.pop(c), categories=list(names[c]))
+        elif c == 'ts': frame[c] = pd.Series(out.pop(c), copy=False).astype(SCHEMA.field('ts').type.to_pandas_dtype())
+        else: frame[c] = out.pop(c)
+    return pd.DataFrame(frame, copy=False)
+
+def _selected_files(root, start, end):
+    days = [d for d in list_partitions(root) if _day_selected(d, start, end)]
+    return [f for d in days for f in sorted(glob.glob(os.path.join(_partition_dir(root, d), "*.parquet")))]
+
+def _scan(files, symbols, venues, start, end, columns, bar, categorical=False):
+    columns = _columns(columns, bar)
+    table = None
+    if files:
+        dataset = ds.dataset(files, format="parquet", schema=SCHEMA)
+        expr = _filter(symbols, venues, start, end)
+        if categorical:
+            df = _categorical_frame(dataset, columns, expr)
+            return resample(df, bar) if bar else df
+        table = dataset.to_table(columns=columns, filter=expr)
+    return _finish(table, columns, bar)
+
+def resample(df, bar):
+    """Mean rate per (symbol, venue) and '1h' / '8h' / '1d' bar (bar start in `ts`)."""
+    grouper = pd.Grouper(key='ts', freq=BARS[bar])
+    return df.groupby(['symbol', 'venue', grouper], observed=True)['rate'].mean().reset_index()
+
+def query(symbols=None, venues=None, start=None, end=None, columns=None, bar=None, root=HISTORY_DIR,
+          categorical=False):
+    """Long rows of the local store matching the filters.
+
+    Day partitions outside [start, end) are never opened, and symbol / venue /
+    time predicates are pushed down to Parquet row-group statistics. With
+    `categorical`, symbol and venue come back as pandas categoricals (a few
+    bytes per row instead of a string each, for long full scans).
+    """
+    start, end = _ts(start), _ts(end)
+    return _scan(_selected_files(root, start, end), _as_list(symbols), _as_list(venues), start, end, columns, bar, categorical)
+
+def distinct(columns=('symbol', 'venue', 'ts'), symbols=None, venues=None, start=None, end=None, root=HISTORY_DIR,
+             buffer_rows=1 << 22):
+    """Sorted distinct values of `columns` over the rows `query` would return,
+    as {column: pd.Index}, in one scan that never holds the rows: symbol and
+    venue are read as Parquet dictionaries (no per-row strings), timestamps are
+    deduplicated `buffer_rows` at a time."""
+    start, end = _ts(start), _ts(end)
+    files = _selected_files(root, start, end)
+    found = {c: set() for c in columns if c in CATEGORICAL}
+    times, buffer, n = np.empty(0, dtype=np.int64), np.empty(buffer_rows if 'ts' in columns else 0, dtype=np.int64), 0
+    if files:
+        # Dictionary-typed keys: no row-group pruning on symbol/venue, fine for a full scan
+        schema = pa.schema([pa.field(f.name, pa.dictionary(pa.int32(), f.type)) if f.name in CATEGORICAL else f for f in SCHEMA])
+        fmt = ds.ParquetFileFormat(read_options=ds.ParquetReadOptions(dictionary_columns=list(CATEGORICAL)))
+        dataset = ds.dataset(files, format=fmt, schema=schema)
+        expr = _filter(_as_list(symbols), _as_list(venues), start, end)
+        for batch in dataset.to_batches(columns=list(columns), filter=expr, fragment_readahead=1, batch_readahead=1):
+            for c, array in zip(batch.schema.names, batch.columns):
+                if c == 'ts':
+                    values = array.to_numpy().view(np.int64)
+                    if n + len(values) > len(buffer): times, n = pd.unique(np.concatenate([times, buffer[:n]])), 0
+                    buffer[n:n + len(values)] = values
+                    n += len(values)
+                elif len(array):
+                    used = np.flatnonzero(np.bincount(array.indices.to_numpy(), minlength=len(array.dictionary)))
+                    found[c].update(array.dictionary.take(used).to_pylist())
+    out = {c: pd.Index(sorted(v), dtype=object) for c, v in found.items()}
+    if 'ts' in columns:
+        times = np.sort(pd.unique(np.concatenate([times, buffer[:n]])))
+        out['ts'] = pd.DatetimeIndex(times.view(f"M8[{SCHEMA.field('ts').type.unit}]"), tz="UTC")
+    return out
+
+
+class _HTTPRangeFile(io.RawIOBase):
+    """Seekable read-only file over HTTP Range requests, so Parquet readers
+    fetch only the footer and the row groups they keep."""
+
+    def __init__(self, url, session, timeout=10, size=None):
+        self.url, self.session, self.timeout = url, session, timeout
+        if size is None:
+            r = session.head(url, timeout=timeout, allow_redirects=True, headers={"Accept-Encoding": "identity"})
+            r.raise_for_status()
+            size = int(r.headers["Content-Length"])
+        self.size, self.pos = size, 0
+
+    def readable(self): return True
+    def seekable(self): return True
+    def tell(self): return self.pos
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self.pos, io.SEEK_END: self.size}[whence]
+        self.pos = base + offset
+        return self.pos
+
+    def read(self, n=-1):
+        n = self.size - self.pos if n is None or n < 0 else min(n, self.size - self.pos)
+        if n <= 0: return b""
+        headers = {"Range": f"bytes={self.pos}-{self.pos + n - 1}", "Accept-Encoding": "identity"}
+        r = self.session.get(self.url, headers=headers, timeout=self.timeout)
+        r.raise_for_status()
+        data = r.content if r.status_code == 206 else r.content[self.pos:self.pos + n]
+        self.pos += len(data)
+        return data
+
+    def readinto(self, buffer):
+        data = self.read(len(buffer))
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _open_remote(url, session, timeout, size=None):
+    if size is not None and size <= RANGE_READ_MIN_BYTES:
+        # Small file: one GET beats the footer + column-chunk range round trips
+        r = session.get(url, timeout=timeout)
+        r.raise_for_status()
+        return pa.BufferReader(r.content)
+    f = _HTTPRangeFile(url, session, timeout, size)
+    if f.size > RANGE_READ_MIN_BYTES: return pa.PythonFile(f, mode="r")
+    return pa.BufferReader(f.read())
+
+_session = None
+_session_lock = threading.Lock()
+
+def _remote_session():
+    # Shared across calls: keep-alive connections to the store survive between queries
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_maxsize=REMOTE_WORKERS)
+            _session.mount("https://", adapter)
+            _session.mount("http://", adapter)
+        return _session
+
+def query_remote(base_url, symbols=None, venues=None, start=None, end=None, columns=None, bar=None,
+                 session=None, timeout=10):
+    """`query` over a published store (e.g. raw.githubusercontent), via its manifest.
+
+    Selected files are fetched and filtered concurrently (REMOTE_WORKERS) on
+    one shared session; sizes from the manifest spare a HEAD per file.
+    """
+    session = session or _remote_session()
+    start, end = _ts(start), _ts(end)
+    manifest = session.get(f"{base_url}/{MANIFEST_NAME}", timeout=timeout).json()
+    files = [rel for rel in manifest.get("files", []) if _day_selected(_day_of(rel), start, end)]
+    sizes = manifest.get("sizes", {})
+    columns, expr = _columns(columns, bar), _filter(_as_list(symbols), _as_list(venues), start, end)
+    fmt = ds.ParquetFileFormat()
+
+    def read(rel):
+        src = _open_remote(f"{base_url}/{rel}", session, timeout, sizes.get(rel))
+        return fmt.make_fragment(src).to_table(schema=SCHEMA, columns=columns, filter=expr)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=REMOTE_WORKERS) as pool:
+        tables = list(pool.map(read, files))
+    return _finish(pa.concat_tables(tables) if tables else None, columns, bar)
@@ -0,0 +1,176 @@
+"""Optional Hyperliquid WebSocket streaming of funding rates.
+
+`HyperliquidStream` subscribes to the `activeAssetCtx` channel for every coin
+of the main dex and of the HIP-3 builder dexes, and keeps an in-memory
+coin -> funding APR table updated from the pushed contexts. While the socket
+is live and fresh, its rates overlay the REST snapshots (`overlay_mainnet`,
+`overlay_hip3`) and are republished to the snapshot store every few seconds;
+on a disconnect the overlay switches off and the last REST results are
+republished at once, so the REST poller's values are served again until the
+stream reconnects (exponential backoff with jitter). The universe lookup of
+each connection (meta, perpDexs, one meta per builder dex) takes its weight
+from the shared `HL_RATE_LIMITER`, like the REST fetchers.
+
+The stream overlays the last REST result it saw (kept by the overlay calls of
+the poller jobs), never the published snapshot, and only publishes over the
+version it read: a poller refresh landing in between is never overwritten.
+
+Enabled in the dashboard with HL_STREAMING=1.
+"""
+import asyncio
+import json
+import random
+import threading
+import time
+
+import pandas as pd
+import requests
+
+from hip3 import BUILDER_MAPPING, HL_INFO_URL, get_underlying, safe_float
+from symbols import SYMBOLS
+from venues import HL_RATE_LIMITER, INFO_WEIGHT
+
+HL_WS_URL = "wss://api.hyperliquid.xyz/ws"
+
+
+class HyperliquidStream:
+    def __init__(self, store=None, url=HL_WS_URL, info_url=HL_INFO_URL, session=None, bucket=None,
+                 publish_interval=2.0, stale_after=60.0, max_backoff=30.0):
+        self.store = store
+        self.url, self.info_url = url, info_url
+        self.session = session or requests.Session()
+        self.bucket = bucket or HL_RATE_LIMITER
+        self.publish_interval, self.stale_after, self.max_backoff = publish_interval, stale_after, max_backoff
+        self.rates = {}             # coin ("BTC" or "xyz:TSLA") -> funding APR
+        self.connected = False
+        self.last_message = 0.0
+        self.reconnects = 0
+        self._rest = {}             # "mainnet" / "hip3" -> last REST result passed to the overlays
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._loop = None
+        self._stop = None
+        self._thread = None
+
+    # --- Universe (REST, once per connection) -------------------------------
+    def coins(self):
+        def post(payload):
+            self.bucket.acquire(INFO_WEIGHT)
+            return self.session.post(self.info_url, json=payload, timeout=10).json()
+        coins = [a['name'] for a in post({"type": "meta"})['universe']]
+        dexs = [d['name'] for d in post({"type": "perpDexs"}) if d and d.get('name') and d['name'] != "test"]
+        for dex in dexs:
+            try: coins += [a['name'] for a in post({"type": "meta", "dex": dex})['universe']]
+            except Exception: continue
+        return coins
+
+    # --- Socket loop --------------------------------------------------------
+    def _on_message(self, raw):
+        msg = json.loads(raw)
+        if msg.get("channel") != "activeAssetCtx": return
+        data = msg["data"]
+        with self._lock:
+            self.rates[data["coin"]] = safe_float(data["ctx"].get("funding")) * 24 * 365 * 100
+            self.last_message = time.time()
+            self._dirty = True
+
+    async def _consume(self):
+        import websockets
+        coins = await asyncio.get_running_loop().run_in_executor(None, self.coins)
+        async with websockets.connect(self.url, ping_interval=20, max_size=None) as ws:
+            for coin in coins:
+                await ws.send(json.dumps({"method": "subscribe", "subscription": {"type": "activeAssetCtx", "coin": coin}}))
+            self.connected = True
+            async for raw in ws: self._on_message(raw)
+
+    async def _run(self):
+        backoff = 1.0
+        while not self._stop.is_set():
+            try:
+                await self._consume()
+                backoff = 1.0
+            except Exception:
+                pass
+            finally:
+                if self.connected: self._dirty = True   # republish the plain REST values
+                self.connected = False
+            if self._stop.is_set(): break
+            self.reconnects += 1
+            try: await asyncio.wait_for(self._stop.wait(), timeout=random.uniform(0, backoff))
+            except asyncio.TimeoutError: pass
+            backoff = min(self.max_backoff, backoff * 2)
+
+    async def _publish_loop(self):
+        while not self._stop.is_set():
+            try: await asyncio.wait_for(self._stop.wait(), timeout=self.publish_interval)
+            except asyncio.TimeoutError: pass
+            if self.store is not None and self._dirty: self.publish()
+
+    async def _main(self):
+        self._stop = asyncio.Event()
+        tasks = [asyncio.ensure_future(self._run()), asyncio.ensure_future(self._publish_loop())]
+        await self._stop.wait()
+        for t in tasks: t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_until_complete, args=(self._main(),), name="hl-stream", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5):
+        if self._loop and self._stop: self._loop.call_soon_threadsafe(self._stop.set)
+        if self._thread: self._thread.join(timeout)
+
+    # --- Overlay on REST snapshots ------------------------------------------
+    @property
+    def live(self):
+        return self.connected and time.time() - self.last_message < self.stale_after
+
+    def _split(self):
+        with self._lock: rates = dict(self.rates)
+        main = {SYMBOLS.canonical(c, 'Hyperliquid'): r for c, r in rates.items() if ':' not in c}
+        hip3 = {c: r for c, r in rates.items() if ':' in c}
+        return main, hip3
+
+    def overlay_mainnet(self, frames):
+        """Streamed rates win over the REST Hyperliquid frame (when live)."""
+        self._rest["mainnet"] = frames
+        return self._overlay_mainnet(frames)
+
+    def overlay_hip3(self, matrix):
+        """Streamed HIP-3 rates win, REST fills builders/symbols not streamed yet."""
+        self._rest["hip3"] = matrix
+        return self._overlay_hip3(matrix)
+
+    def _overlay_mainnet(self, frames):
+        if frames is None or not self.live: return frames
+        main, _ = self._split()
+        if not main: return frames
+        streamed = pd.Series(main, name='Hyperliquid')
+        rest = frames.get('Hyperliquid')
+        if rest is not None and not rest.empty:
+            streamed = streamed.combine_first(rest.groupby('symbol')['Hyperliquid'].mean())
+        return {**frames, 'Hyperliquid': streamed.rename_axis('symbol').reset_index()}
+
+    def _overlay_hip3(self, matrix):
+        if not self.live: return matrix
+        _, hip3 = self._split()
+        if not hip3: return matrix
+        df = pd.DataFrame([
+            {"Builder": BUILDER_MAPPING.get(c.split(':')[0], c.split(':')[0]), "Symbol": get_underlying(c), "Funding APR": r}
+            for c, r in hip3.items()
+        ])
+        streamed = df.pivot_table(index='Symbol', columns='Builder', values='Funding APR', aggfunc='mean')
+        if matrix is None or matrix.empty: return streamed
+        return streamed.combine_first(matrix)[list(dict.fromkeys(list(matrix.columns) + list(streamed.columns)))]
+
+    def publish(self):
+        self._dirty = False
+        for key, overlay in (("mainnet", self._overlay_mainnet), ("hip3", self._overlay_hip3)):
+            # Version read before the REST result: a refresh in between fails the publish
+            snap = self.store.latest(key)
+            rest = self._rest.get(key)
+            if snap is None or rest is None: continue
+            self.store.publish(key, overlay(rest), if_version=snap.version)
@@ -0,0 +1,99 @@
+"""Columnar spread kernel for the symbol x venue funding matrix.
+
+`spread_kernel` replaces the row-wise `DataFrame.apply` helpers of the pages:
+one NumPy pass over the matrix gives the cheapest / most expensive venue of
+every row, the spread, the trade-action label, the historical pair average
+and the flip/divergence alert flags. `style_frame` turns those arrays into the
+CSS frame the Styler needs, so styling no longer searches rows again.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+LONG_CSS = 'background-color: #006400; color: white'
+SHORT_CSS = 'background-color: #8B0000; color: white'
+
+
+@dataclass
+class SpreadResult:
+    venues: list
+    valid: np.ndarray       # row has >= min_count quoted venues
+    min_idx: np.ndarray     # column of the lowest rate (LONG leg), -1 if not valid
+    max_idx: np.ndarray     # column of the highest rate (SHORT leg), -1 if not valid
+    spread: np.ndarray
+    action: np.ndarray      # "🟢 LONG x / 🔴 SHORT y" labels, "-" if not valid
+    pair_avg: np.ndarray    # hist[short] - hist[long], NaN when unknown
+    flip: np.ndarray        # spread and pair average have opposite signs
+    diverge: np.ndarray     # spread far above its historical average
+
+    @property
+    def alert(self):
+        return self.flip | self.diverge
+
+    def take(self, order):
+        """Reorder every per-row array (e.g. after sorting the table)."""
+        return SpreadResult(self.venues, *(getattr(self, f)[order] for f in (
+            'valid', 'min_idx', 'max_idx', 'spread', 'action', 'pair_avg', 'flip', 'diverge')))
+
+
+def spread_kernel(values, venues, hist=None, min_count=2):
+    """Vectorized min/max legs, spread, labels and alerts of a (n, k) rate matrix.
+
+    `hist` is an optional (n, k) matrix of historical averages in the same
+    venue order as `values`.
+    """
+    values = np.asarray(values, dtype=float)
+    n = values.shape[0]
+    rows = np.arange(n)
+    quoted = ~np.isnan(values)
+    valid = quoted.sum(axis=1) >= min_count
+
+    # argmin/argmax return the first occurrence on ties, like idxmin/idxmax
+    min_idx = np.where(quoted, values, np.inf).argmin(axis=1)
+    max_idx = np.where(quoted, values, -np.inf).argmax(axis=1)
+    spread = np.where(valid, values[rows, max_idx] - values[rows, min_idx], np.nan)
+
+    names = np.asarray(venues, dtype=object)
+    action = np.where(valid, "🟢 LONG " + names[min_idx] + " / 🔴 SHORT " + names[max_idx], "-")
+
+    if hist is None:
+        pair_avg = np.full(n, np.nan)
+    else:
+        hist = np.asarray(hist, dtype=float)
+        pair_avg = np.where(valid, hist[rows, max_idx] - hist[rows, min_idx], np.nan)
+
+    has_avg = ~np.isnan(pair_avg)
+    with np.errstate(invalid='ignore'):
+        flip = has_avg & (((spread > 0) & (pair_avg < 0)) | ((spread < 0) & (pair_avg > 0)))
+        diverge = has_avg & (np.abs(spread - pair_avg) > 5) & (np.abs(spread) > np.abs(pair_avg) * 2)
+
+    return SpreadResult(
+        list(venues), valid,
+        np.where(valid, min_idx, -1), np.where(valid, max_idx, -1),
+        spread, action, pair_avg, flip, diverge,
+    )
+
+
+def opportunity_score(spread):
+    spread = np.asarray(spread, dtype=float)
+    return np.select([spread > 100, spread > 30], ["🔥 HIGH", "⚡ MEDIUM"], "❄️ LOW")
+
+
+def style_frame(index, columns, res, spread_col=None, spread_mask=None, spread_css='',
+                long_css=LONG_CSS, short_css=SHORT_CSS):
+    """CSS frame for `Styler.apply(..., axis=None)` built from a SpreadResult.
+
+    Rows must be in the same order as the matrix given to the kernel.
+    """
+    css = np.full((len(index), len(columns)), '', dtype=object)
+    col_pos = {c: i for i, c in enumerate(columns)}
+    venue_pos = np.array([col_pos.get(v, -1) for v in res.venues] + [-1])
+    rows = np.flatnonzero(res.valid)
+    for idx, style in ((res.min_idx, long_css), (res.max_idx, short_css)):
+        cols = venue_pos[idx[rows]]
+        keep = cols >= 0
+        css[rows[keep], cols[keep]] = style
+    if spread_col in col_pos and spread_mask is not None:
+        css[np.asarray(spread_mask, dtype=bool), col_pos[spread_col]] = spread_css
+    return pd.DataFrame(css, index=index, columns=columns)
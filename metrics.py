@@ -0,0 +1,172 @@
+"""Minimal Prometheus-style metrics for the fetch path.
+
+Counters, gauges and histograms keyed by label values, kept in a process-wide
+`REGISTRY` and rendered in the Prometheus text format (`REGISTRY.render()`,
+or `serve(port)` for a `/metrics` endpoint). The fetch engine records, per
+venue and per refresh, the request latency, bytes received, parse time, row
+count, error class of failed calls and reuse of unchanged responses (see
+`VENUE_METRICS`).
+"""
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7)
+
+
+def _fmt_labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs: return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in pairs) + "}"
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[k]) for k in self.labels)
+
+    def _lines(self):
+        raise NotImplementedError
+
+    def render(self):
+        head = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock: return head + self._lines()
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1.0, **labels):
+        key = self._key(labels)
+        with self._lock: self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels):
+        return self._values.get(self._key(labels), 0.0)
+
+    def _lines(self):
+        return [f"{self.name}{_fmt_labels(self.labels, k)} {v:g}" for k, v in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock: self._values[key] = float(value)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * (len(self.buckets) + 1), 0.0))
+            counts[bisect.bisect_left(self.buckets, value)] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels):
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return sum(counts)
+
+    def _lines(self):
+        lines = []
+        for key, (counts, total) in sorted(self._values.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets + (float("inf"),), counts):
+                cumulative += n
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, [('le', le)])} {cumulative}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {total:g}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        # Idempotent: modules re-imported by Streamlit reruns get the same metric
+        with self._lock:
+            if name not in self._metrics: self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, help, labels=()):
+        return self._get(Counter, name, help, labels)
+
+    def gauge(self, name, help, labels=()):
+        return self._get(Gauge, name, help, labels)
+
+    def histogram(self, name, help, labels=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help, labels, buckets)
+
+    def render(self):
+        with self._lock: metrics = list(self._metrics.values())
+        return "\n".join(line for m in metrics for line in m.render()) + "\n"
+
+
+REGISTRY = Registry()
+
+
+# ==============================================================================
+#                               FETCH-PATH METRICS
+# ==============================================================================
+class VenueMetrics:
+    """Per-venue fetch metrics shared by every engine of the process."""
+
+    def __init__(self, registry=REGISTRY):
+        self.latency = registry.histogram("venue_request_seconds", "HTTP request latency per venue.", ["venue"])
+        self.parse = registry.histogram("venue_parse_seconds", "Response parse time per venue.", ["venue"])
+        self.bytes = registry.histogram("venue_response_bytes", "Response body size per venue.", ["venue"], BYTES_BUCKETS)
+        self.rows = registry.gauge("venue_rows", "Rows returned by the last successful fetch.", ["venue"])
+        self.fetches = registry.counter("venue_fetch_total", "Venue fetches by outcome (ok or error class).", ["venue", "outcome"])
+        self.last_success = registry.gauge("venue_last_success_timestamp_seconds", "Unix time of the last successful fetch.", ["venue"])
+        self.cache_hits = registry.counter("venue_cache_hits_total", "Unchanged responses whose previous frame was reused (304 or hash).", ["venue", "kind"])
+
+    def record(self, stat):
+        self.fetches.inc(venue=stat.venue, outcome=stat.error or "ok")
+        if stat.latency is not None: self.latency.observe(stat.latency, venue=stat.venue)
+        if stat.error: return
+        if getattr(stat, 'cache', None): self.cache_hits.inc(venue=stat.venue, kind=stat.cache)
+        self.parse.observe(stat.parse_time, venue=stat.venue)
+        self.bytes.observe(stat.bytes, venue=stat.venue)
+        self.rows.set(stat.rows, venue=stat.venue)
+        self.last_success.set(stat.finished_at, venue=stat.venue)
+
+VENUE_METRICS = VenueMetrics()
+
+
+def serve(port, host="0.0.0.0", registry=REGISTRY):
+    """Expose `registry` on http://host:port/metrics from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render().encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    return server
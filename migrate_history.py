@@ -0,0 +1,38 @@
+"""Migrate the funding history to the long storage schema (`history.SCHEMA`).
+
+    python migrate_history.py [--legacy funding_history.parquet] [--root funding_history]
+
+Imports the legacy single-file history into day partitions, rewrites any
+partition file still in the former wide layout, rebuilds the rolling-average
+index and the manifest. Safe to run more than once: migrated files are skipped.
+"""
+import argparse
+import os
+
+import averages
+import history
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--legacy", default=history.LEGACY_FILE, help="old single-file history")
+    parser.add_argument("--root", default=history.HISTORY_DIR, help="partitioned history directory")
+    args = parser.parse_args(argv)
+
+    size_before = sum(os.path.getsize(f) for f in [args.legacy] + history._data_files(args.root) if os.path.exists(f))
+
+    if history.migrate_legacy(args.legacy, args.root):
+        print(f"📦 {args.legacy} importé en partitions journalières.")
+    migrated = history.migrate_wide_files(args.root)
+    print(f"📦 {len(migrated)} fichiers convertis au schéma long.")
+
+    long = history.read_history(args.root, wide=False)
+    averages.RollingIndex.rebuild(long).save(args.root)
+    history.write_manifest(args.root)
+
+    size_after = sum(os.path.getsize(f) for f in history._data_files(args.root))
+    print(f"✅ {len(long)} lignes, {size_before / 1e6:.2f} MB -> {size_after / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
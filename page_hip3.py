@@ -0,0 +1,55 @@
+"""HIP-3 page: funding of the builder dexes side by side."""
+import streamlit as st
+
+import dashboard
+
+PAGE = "HIP-3"
+
+
+@dashboard.table_cache
+def get_hip3_table(version, builders, _df_matrix):
+    from tables import hip3_table
+    table = hip3_table(_df_matrix, list(builders))
+    dashboard.save_table("hip3", table.arrow)
+    return table
+
+
+def render():
+    st.markdown("## 🏗️ HIP-3 Arbitrage")
+
+    # --- HIP-3 UI ---
+    snap = dashboard.page_snapshot("hip3", "hip3", PAGE, "Loading HIP-3 Data...")
+
+    df_matrix = snap.data if snap is not None and snap.data is not None else None
+    if snap is not None and snap.error and (df_matrix is None or df_matrix.empty): st.error(f"HIP-3 API Error: {snap.error}")
+
+    if df_matrix is not None and not df_matrix.empty:
+        # --- FILTERS SECTION ---
+        st.sidebar.subheader("🔎 Builders Filters")
+
+        all_builders = list(df_matrix.columns)
+        selected_builders = []
+
+        # Boucle simple : une case par builder, cochée par défaut
+        for b in all_builders:
+            if st.sidebar.checkbox(b, value=True, key=f"h3_{b}"):
+                selected_builders.append(b)
+
+        if len(selected_builders) < 2:
+            st.warning("Please select at least 2 builders.")
+            return
+
+        # --- DATA PROCESSING (cached per snapshot version) ---
+        table = get_hip3_table(snap.version, tuple(selected_builders), df_matrix)
+
+        st.write(f"Active Comparison: **{', '.join(selected_builders)}**")
+
+        dashboard.render_table(
+            table, PAGE,
+            height=min((len(table.frame)+1)*35+3, 1000),
+            column_order=['Symbol'] + selected_builders + ['APR Spread', 'Trade Action'],
+        )
+    else:
+        st.info("Loading HIP-3 Data...")
+
+    dashboard.render_data_health(dashboard.get_hip3_fetcher().health(), dashboard.HIP3_INTERVAL)
@@ -0,0 +1,85 @@
+"""Multi-DEX page: mainnet venues side by side, 48h pair averages and spread history."""
+import streamlit as st
+
+import dashboard
+
+PAGE = "Multi-DEX"
+
+
+@st.cache_data(ttl=300)
+def get_48h_averages():
+    # Small precomputed artifact maintained by the recorder (no raw history download)
+    from datetime import datetime
+    import pandas as pd
+    from averages import read_averages
+    try: return read_averages(dashboard.HISTORY_URL, window='48h'), datetime.now().timestamp()
+    except Exception as e:
+        st.warning(f"48h averages unavailable ({type(e).__name__}).")
+        return pd.DataFrame(), None
+
+@st.cache_data(ttl=300)
+def get_symbol_history(symbol, venues, days=7):
+    # Only this symbol's row groups are fetched, resampled to hourly bars
+    import pandas as pd
+    import history
+    start = pd.Timestamp.now(tz='UTC') - pd.Timedelta(days=days)
+    try: df_h = history.query_remote(dashboard.HISTORY_URL, symbols=symbol, venues=list(venues), start=start, bar='1h')
+    except Exception as e:
+        st.warning(f"History unavailable for {symbol} ({type(e).__name__}).")
+        return pd.DataFrame()
+    if df_h.empty: return pd.DataFrame()
+    wide = df_h.pivot_table(index='ts', columns='venue', values='rate', observed=True)
+    wide['APR Spread'] = wide.max(axis=1) - wide.min(axis=1)
+    return wide
+
+@dashboard.table_cache
+def get_multidex_table(version, selected_ex, hist_loaded_at, with_history, _df, _df_hist):
+    from tables import multidex_table
+    df = _df.merge(_df_hist, on='symbol', how='left') if hist_loaded_at is not None else _df
+    table = multidex_table(df, list(selected_ex), with_history=with_history)
+    if table is not None: dashboard.save_table("multidex", table.arrow)
+    return table
+
+
+def render():
+    from venues import EXCHANGES
+    st.markdown("## 🌐 Multi-DEX Arbitrage")
+
+    st.sidebar.subheader("🔎 Mainnet Filters")
+    selected_ex = [e for e in EXCHANGES if st.sidebar.checkbox(e, value=True, key=f"main_{e}")]
+    show_history = st.sidebar.checkbox("Show Pair 48h Avg", value=True)
+
+    if len(selected_ex) < 2:
+        st.warning("Please select at least 2 exchanges.")
+        return
+
+    snap = dashboard.page_snapshot("mainnet", "multidex", PAGE, "Loading Multi-DEX Data...")
+    if snap is None or snap.data is None:
+        st.info("Loading Multi-DEX Data...")
+        return
+    df = dashboard.get_venue_matrix().update(snap.data)
+
+    # The 48h averages are only downloaded when the column is shown
+    if show_history: df_hist, hist_loaded_at = get_48h_averages()
+    else: df_hist, hist_loaded_at = None, None
+    if df_hist is not None and df_hist.empty: hist_loaded_at = None
+    table = get_multidex_table(snap.version, tuple(selected_ex), hist_loaded_at, hist_loaded_at is not None, df, df_hist)
+
+    if table is not None:
+        dashboard.render_table(table, PAGE)
+
+        # --- SPREAD HISTORY ---
+        st.markdown("### 📈 Spread History")
+        symbol = st.selectbox("Symbol", ["-"] + list(table.frame['symbol']), key="hist_symbol")
+        if symbol != "-":
+            df_h = get_symbol_history(symbol, tuple(selected_ex))
+            if df_h.empty:
+                st.info("No recorded history for this symbol.")
+            else:
+                import plotly.express as px
+                fig = px.line(df_h, x=df_h.index, y=list(df_h.columns), labels={'ts': '', 'value': 'APR %', 'variable': ''})
+                st.plotly_chart(fig, use_container_width=True)
+    else:
+        st.info("No common pairs found.")
+
+    dashboard.render_data_health(dashboard.get_fetch_engine().health(), dashboard.MAINNET_INTERVAL)
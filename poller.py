@@ -0,0 +1,105 @@
+"""Background poller and in-process snapshot store.
+
+One `Poller` per server process refreshes each data source on its own
+schedule and publishes the result into a `SnapshotStore`. Page renders only
+read the latest published snapshot, so they never wait on exchange APIs and
+the number of upstream requests does not grow with the number of viewers.
+"""
+import threading
+import time
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    version: int
+    data: object
+    fetched_at: float       # time.time() of the successful refresh
+    duration: float         # seconds the refresh took
+    error: str = None       # last refresh error, data is then the previous good one
+
+    @property
+    def age(self):
+        return time.time() - self.fetched_at
+
+
+class SnapshotStore:
+    """Versioned, thread-safe latest-value store keyed by source name."""
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._snapshots = {}
+
+    def publish(self, key, data, duration=0.0, if_version=None):
+        """New version of `key`; with `if_version`, only if that is still the latest (else None)."""
+        with self._cond:
+            prev = self._snapshots.get(key)
+            if if_version is not None and (prev.version if prev else 0) != if_version: return None
+            snap = Snapshot((prev.version if prev else 0) + 1, data, time.time(), duration)
+            self._snapshots[key] = snap
+            self._cond.notify_all()
+            return snap
+
+    def publish_error(self, key, error):
+        # Keep serving the last good data; only record what went wrong.
+        with self._cond:
+            prev = self._snapshots.get(key) or Snapshot(0, None, 0.0, 0.0)
+            snap = Snapshot(prev.version, prev.data, prev.fetched_at, prev.duration, error=repr(error))
+            self._snapshots[key] = snap
+            self._cond.notify_all()
+            return snap
+
+    def latest(self, key):
+        with self._cond:
+            return self._snapshots.get(key)
+
+    def wait(self, key, timeout=None, after_version=0):
+        """Block until `key` has a version newer than `after_version`, an error, or timeout."""
+        def ready():
+            snap = self._snapshots.get(key)
+            return snap is not None and (snap.version > after_version or snap.error is not None)
+
+        with self._cond:
+            self._cond.wait_for(ready, timeout=timeout)
+            return self._snapshots.get(key)
+
+
+class Poller:
+    """Runs every registered job on its interval in a daemon thread."""
+
+    def __init__(self, store=None):
+        self.store = store or SnapshotStore()
+        self._jobs = {}
+        self._stop = threading.Event()
+        self._threads = []
+
+    def add_job(self, key, func, interval):
+        self._jobs[key] = (func, interval)
+        return self
+
+    def refresh(self, key):
+        func, _ = self._jobs[key]
+        t0 = time.perf_counter()
+        try:
+            data = func()
+        except Exception as e:
+            return self.store.publish_error(key, e)
+        return self.store.publish(key, data, time.perf_counter() - t0)
+
+    def _run(self, key):
+        interval = self._jobs[key][1]
+        while not self._stop.is_set():
+            t0 = time.monotonic()
+            self.refresh(key)
+            self._stop.wait(max(0.0, interval - (time.monotonic() - t0)))
+
+    def start(self):
+        for key in self._jobs:
+            t = threading.Thread(target=self._run, args=(key,), name=f"poller-{key}", daemon=True)
+            t.start()
+            self._threads.append(t)
+        return self
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        for t in self._threads: t.join(timeout)
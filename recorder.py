@@ -1,121 +1,178 @@
-import pandas as pd
-import requests
+import argparse
 import datetime
 import os
+import signal
+import threading
+import time
+
+import alerts
+import averages
+import history
+import metrics
+from venues import FetchEngine, VenueMatrix, default_venues
 
 # --- CONFIGURATION ---
 # Sur GitHub, les clés sont lues via les "Secrets" (Variables d'environnement)
 EXT_API_KEY = os.environ.get("EXT_API_KEY")
 PACIFICA_API_KEY = os.environ.get("PACIFICA_API_KEY")
-FILE_NAME = "funding_history.parquet"
 
-# URLs
-VAR_URL = "https://omni-client-api.prod.ap-northeast-1.variational.io/metadata/stats"
-HL_URL = "https://api.hyperliquid.xyz/info"
-LIGHTER_URL = "https://mainnet.zklighter.elliot.ai/api/v1/funding-rates"
-EXT_URL = "https://api.starknet.extended.exchange/api/v1/info/markets"
-PAC_URL = "https://api.pacifica.fi/api/v1/info"
+# Mode démon : un snapshot toutes les 30s, écrit par lots (taille ou délai)
+DAEMON_INTERVAL = 30
+FLUSH_SIZE = 20
+FLUSH_INTERVAL = 600
+
+def make_alert_engine(args):
+    # Règles d'alerte (JSON) évaluées à chaque snapshot ; état conservé entre les runs
+    if not args.alerts: return None
+    sinks = [alerts.FileSink(args.alert_file)] if args.alert_file else []
+    if args.alert_webhook: sinks.append(alerts.WebhookSink(args.alert_webhook))
+    return alerts.AlertEngine(alerts.load_rules(args.alerts), sinks, state_path=args.alert_state)
+
+def load_pair_averages():
+    # Moyennes 48h locales (règles "flip" / "diverge"), None avant le premier index
+    root = os.path.join(os.getcwd(), history.HISTORY_DIR)
+    if not os.path.exists(os.path.join(root, averages.AVERAGES_NAME)): return None
+    return averages.read_averages(root, window='48h')
 
-def fetch_all_rates():
+def check_alerts(engine, df, hist):
+    fired = engine.evaluate(df, hist=hist, ts=df['timestamp'].iloc[0])
+    for a in fired: print(f"🚨 {a.message}")
+    for err in engine.errors: print(f"❌ Envoi des alertes échoué : {err}")
+
+def make_engine():
+    # Les 5 venues en parallèle (moteur partagé avec le dashboard)
+    return FetchEngine(default_venues(EXT_API_KEY, PACIFICA_API_KEY, timeout=10), deadline=20)
+
+def fetch_all_rates(engine=None, matrix=None):
     print(f"🔄 Récupération des données... {datetime.datetime.now()}")
-    
-    # 1. Variational
-    try:
-        r_var = requests.get(VAR_URL, timeout=10).json()
-        df_var = pd.DataFrame(r_var['listings'])
-        df_var['Variational'] = pd.to_numeric(df_var['funding_rate']) * 100
-        df_var = df_var[['ticker', 'Variational']].rename(columns={'ticker': 'symbol'})
-    except: df_var = pd.DataFrame(columns=['symbol', 'Variational'])
 
-    # 2. Hyperliquid
+    owned = engine is None
+    engine = engine or make_engine()
     try:
-        r_hl = requests.post(HL_URL, json={"type": "metaAndAssetCtxs"}, timeout=10).json()
-        hl_data = [
-            {'symbol': m['name'], 'Hyperliquid': (float(r_hl[1][i]['funding']) * 3 * 365) * 100 * 8} 
-            for i, m in enumerate(r_hl[0]['universe'])
-        ]
-        df_hl = pd.DataFrame(hl_data)
-    except: df_hl = pd.DataFrame(columns=['symbol', 'Hyperliquid'])
-
-    # 3. Lighter
-    try:
-        r_li = requests.get(LIGHTER_URL, headers={"accept": "application/json"}, timeout=10).json()
-        li_data = [
-            {'symbol': i['symbol'].replace('1000',''), 'Lighter': (float(i['rate']) * 3 * 365) * 100} 
-            for i in r_li.get('funding_rates', [])
-        ]
-        df_li = pd.DataFrame(li_data).groupby('symbol')['Lighter'].mean().reset_index()
-    except: df_li = pd.DataFrame(columns=['symbol', 'Lighter'])
-
-    # 4. Extended
-    try:
-        headers = {"X-Api-Key": EXT_API_KEY, "User-Agent": "Mozilla/5.0"}
-        r_ext = requests.get(EXT_URL, headers=headers, timeout=10).json()
-        ext_data = []
-        for item in r_ext.get('data', []):
-            stats = item.get('marketStats', {})
-            sym = item.get('name', '').split('-')[0]
-            rate = float(stats.get('fundingRate', 0))
-            ext_data.append({'symbol': sym, 'Extended': rate * 24 * 365 * 100})
-        df_ext = pd.DataFrame(ext_data)
-    except: df_ext = pd.DataFrame(columns=['symbol', 'Extended'])
-
-    # 5. Pacifica
-    try:
-        headers_pac = {"X-Api-Key": PACIFICA_API_KEY, "User-Agent": "Mozilla/5.0"}
-        r_pac = requests.get(PAC_URL, headers=headers_pac, timeout=10).json()
-        pac_data = []
-        for item in r_pac.get('data', []):
-            rate = float(item.get('next_funding_rate', 0))
-            annual_apr = rate * 24 * 365 * 100
-            pac_data.append({'symbol': item.get('symbol', '').replace('-USD', ''), 'Pacifica': annual_apr})
-        df_pac = pd.DataFrame(pac_data)
-    except: df_pac = pd.DataFrame(columns=['symbol', 'Pacifica'])
-
-    # Fusion
-    df = pd.merge(df_var, df_hl, on='symbol', how='outer')
-    df = pd.merge(df, df_li, on='symbol', how='outer')
-    df = pd.merge(df, df_ext, on='symbol', how='outer')
-    df = pd.merge(df, df_pac, on='symbol', how='outer')
-    
-    df['timestamp'] = datetime.datetime.now()
-    return df
-
-def save_to_parquet(df_new):
-    file_path = os.path.join(os.getcwd(), FILE_NAME)
-
-    if os.path.exists(file_path):
-        try:
-            df_old = pd.read_parquet(file_path)
-            df_combined = pd.concat([df_old, df_new], ignore_index=True)
-            
-            # --- NETTOYAGE (Garder 7 jours glissants) ---
-            if 'timestamp' in df_combined.columns:
-                df_combined['timestamp'] = pd.to_datetime(df_combined['timestamp'])
-                cutoff_date = datetime.datetime.now() - datetime.timedelta(days=7)
-                df_combined = df_combined[df_combined['timestamp'] > cutoff_date]
-            # --------------------------------------------
-
-            df_combined.to_parquet(file_path, engine='pyarrow', compression='snappy')
-            print(f"✅ Historique mis à jour ! Total lignes : {len(df_combined)}")
-        except Exception as e:
-            print(f"❌ Erreur lecture, écrasement : {e}")
-            df_new.to_parquet(file_path, engine='pyarrow', compression='snappy')
+        frames = engine.snapshot()
+    finally:
+        if owned: engine.close()
+    for name, d in frames.items():
+        stat = engine.stats.get(name)
+        if stat is not None and stat.error: print(f"❌ {name} : {stat.error} après {stat.latency:.1f}s")
+        elif d.empty: print(f"⚠️ {name} : aucune donnée.")
+        elif stat is not None and stat.cache: print(f"   {name} : inchangé ({stat.cache}), {stat.latency * 1000:.0f} ms")
+        elif stat is not None: print(f"   {name} : {stat.rows} marchés, {stat.latency * 1000:.0f} ms, {stat.bytes / 1024:.0f} Ko")
+
+    # Fusion (en démon, seules les colonnes des venues modifiées sont recalculées)
+    df = (matrix or VenueMatrix()).update(frames)
+
+    return df.assign(timestamp=datetime.datetime.now(datetime.timezone.utc))
+
+def save_to_parquet(snapshots):
+    # Append-only : un petit fichier par lot, jamais de réécriture de l'historique
+    snapshots = [snapshots] if hasattr(snapshots, 'columns') else list(snapshots)
+    root = os.path.join(os.getcwd(), history.HISTORY_DIR)
+    legacy = os.path.join(os.getcwd(), history.LEGACY_FILE)
+
+    if history.migrate_legacy(legacy, root):
+        print(f"📦 Ancien fichier {history.LEGACY_FILE} migré en partitions journalières.")
+    # Une seule fois : le manifeste porte ensuite le marqueur du schéma long
+    if history.needs_wide_migration(root):
+        migrated = history.migrate_wide_files(root)
+        if migrated: print(f"📦 {len(migrated)} fichiers convertis au schéma long.")
+
+    paths = history.append_batch(snapshots, root)
+    n_rows = sum(len(df) for df in snapshots)
+    for path in paths:
+        print(f"✅ Snapshots ajoutés : {os.path.relpath(path, root)} ({len(snapshots)} snapshots, {n_rows} lignes)")
+
+    # --- NETTOYAGE (Compaction des jours clos + 7 jours glissants) ---
+    n_compacted = history.compact(root)
+    if n_compacted: print(f"🗜️ {n_compacted} snapshots compactés.")
+    dropped = history.apply_retention(root, days=history.RETENTION_DAYS)
+    if dropped: print(f"🧹 Partitions supprimées : {', '.join(d.isoformat() for d in dropped)}")
+    # ----------------------------------------------------------------
+
+    # --- MOYENNES GLISSANTES (index incrémental 1h/8h/48h/7d) ---
+    index = averages.RollingIndex.load(root)
+    if index is None:
+        index = averages.RollingIndex.rebuild(history.read_history(root, wide=False))
+        print("📈 Index des moyennes reconstruit depuis l'historique.")
     else:
-        df_new.to_parquet(file_path, engine='pyarrow', compression='snappy')
-        print(f"✅ Nouveau fichier créé.")
+        for df in snapshots: index.update(df)
+    index.save(root)
+
+    history.write_manifest(root)
+
+def run_daemon(interval=DAEMON_INTERVAL, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL, alert_engine=None):
+    """Snapshot every `interval` seconds; write the buffer every `flush_size`
+    snapshots or `flush_interval` seconds, and once more on SIGTERM/SIGINT.
+    Each snapshot is checked against `alert_engine` when given."""
+    stop = threading.Event()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(sig, lambda *_: stop.set())
+
+    engine = make_engine()   # connexions keep-alive et réponses précédentes conservées entre les snapshots
+    matrix = VenueMatrix()
+    buffer, last_flush = [], time.monotonic()
+    hist = load_pair_averages() if alert_engine else None
+
+    def flush():
+        nonlocal buffer, last_flush, hist
+        if buffer:
+            try:
+                save_to_parquet(buffer)
+                buffer = []
+                if alert_engine: hist = load_pair_averages()
+            except Exception as e:
+                # On garde le lot en mémoire et on retente au prochain déclenchement
+                print(f"❌ Écriture du lot échouée ({len(buffer)} snapshots) : {e!r}")
+        last_flush = time.monotonic()
+
+    print(f"🚀 Recorder en mode démon (snapshot {interval}s, lot {flush_size} / {flush_interval}s)")
+    try:
+        while not stop.is_set():
+            t0 = time.monotonic()
+            try:
+                df = fetch_all_rates(engine, matrix)
+                if not df.empty:
+                    buffer.append(df)
+                    if alert_engine: check_alerts(alert_engine, df, hist)
+                else: print("⚠️ Aucune donnée récupérée.")
+            except Exception as e:
+                print(f"❌ Snapshot échoué : {e!r}")
+            if len(buffer) >= flush_size or time.monotonic() - last_flush >= flush_interval:
+                flush()
+            stop.wait(max(0.0, interval - (time.monotonic() - t0)))
+    finally:
+        print(f"🛑 Arrêt demandé : écriture des {len(buffer)} snapshots en attente.")
+        flush()
+        engine.close()
 
 if __name__ == "__main__":
-    print("🚀 Script lancé par GitHub Action...")
-    
+    parser = argparse.ArgumentParser(description="Enregistre les funding rates dans l'historique.")
+    parser.add_argument("--daemon", action="store_true", help="tourne en continu au lieu d'un seul snapshot")
+    parser.add_argument("--interval", type=float, default=DAEMON_INTERVAL, help="secondes entre deux snapshots (démon)")
+    parser.add_argument("--flush-size", type=int, default=FLUSH_SIZE, help="snapshots par lot écrit (démon)")
+    parser.add_argument("--flush-interval", type=float, default=FLUSH_INTERVAL, help="secondes max entre deux écritures (démon)")
+    parser.add_argument("--metrics-port", type=int, help="expose les métriques Prometheus sur ce port (démon)")
+    parser.add_argument("--alerts", metavar="RULES.json", help="règles d'alerte évaluées à chaque snapshot")
+    parser.add_argument("--alert-file", help="ajoute les alertes déclenchées à ce fichier (JSON lines)")
+    parser.add_argument("--alert-webhook", help="envoie les alertes déclenchées à ce webhook (POST JSON)")
+    parser.add_argument("--alert-state", default="alerts_state.json", help="état des alertes entre deux runs")
+    args = parser.parse_args()
+
     # Vérification des clés
     if not EXT_API_KEY: print("⚠️ Warning: EXT_API_KEY manquante.")
     if not PACIFICA_API_KEY: print("⚠️ Warning: PACIFICA_API_KEY manquante.")
 
-    df = fetch_all_rates()
-    if not df.empty:
-        save_to_parquet(df)
+    alert_engine = make_alert_engine(args)
+    if args.daemon:
+        if args.metrics_port: metrics.serve(args.metrics_port)
+        run_daemon(args.interval, args.flush_size, args.flush_interval, alert_engine)
     else:
-        print("⚠️ Aucune donnée récupérée.")
-    
+        print("🚀 Script lancé par GitHub Action...")
+        df = fetch_all_rates()
+        if not df.empty:
+            save_to_parquet(df)
+            if alert_engine: check_alerts(alert_engine, df, load_pair_averages())
+        else:
+            print("⚠️ Aucune donnée récupérée.")
+
     print("🏁 Fin du script (Arrêt propre).")
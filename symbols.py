@@ -0,0 +1,69 @@
+"""Central symbol registry: every venue ticker -> one canonical symbol.
+
+Venues quote the same market under different tickers: "BTC-USD" (Extended,
+Pacifica), "xyz:TSLA" (HIP-3 builder dexes), "1000PEPE" (Lighter) or "kPEPE"
+(Hyperliquid) for contracts quoted per 1000 units. Funding rates do not
+depend on the contract size, so multiplier variants share the canonical
+symbol of the underlying.
+
+`SymbolRegistry.normalize` maps a whole column at once: each distinct ticker
+is resolved once, then memoized per venue, so a refresh only does a
+dictionary lookup per new ticker and an array take for the rows.
+"""
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Explicit aliases win over the generic rules ("<venue>:<ticker>" or "<ticker>")
+ALIASES = {}
+
+_QUOTE_SUFFIX = re.compile(r"[-/_](USD|USDC|USDT|PERP)$")
+# 1000PEPE / 1000000MOG / kPEPE: contract quoted per 1000 (or 1M) units
+_MULTIPLIER_PREFIX = re.compile(r"^(?:1000000|1000|k)(?=[A-Z][A-Z0-9]*$)")
+
+
+def canonical(ticker):
+    """Canonical symbol of one raw venue ticker (generic rules, no aliases)."""
+    if not isinstance(ticker, str): return ticker
+    s = ticker.strip()
+    if ':' in s: s = s.split(':')[-1]           # HIP-3 "dex:COIN"
+    s = _QUOTE_SUFFIX.sub("", s)
+    return _MULTIPLIER_PREFIX.sub("", s)
+
+
+class SymbolRegistry:
+    """Memoized alias -> canonical maps, one per venue."""
+
+    def __init__(self, aliases=None):
+        self.aliases = dict(ALIASES if aliases is None else aliases)
+        self._maps = {}         # venue -> {raw ticker: canonical}
+        self._lock = threading.Lock()
+
+    def _resolve(self, ticker, venue):
+        alias = self.aliases.get(f"{venue}:{ticker}", self.aliases.get(ticker))
+        return alias if alias is not None else canonical(ticker)
+
+    def canonical(self, ticker, venue=None):
+        m = self._maps.get(venue)
+        if m is None or ticker not in m:
+            with self._lock: m = self._maps.setdefault(venue, {})
+            m[ticker] = self._resolve(ticker, venue)
+        return m[ticker]
+
+    def normalize(self, tickers, venue=None):
+        """Canonical symbols of a ticker column (object ndarray, same order)."""
+        codes, uniques = pd.factorize(np.asarray(tickers, dtype=object))
+        if not len(uniques): return np.asarray(tickers, dtype=object)
+        mapped = np.array([self.canonical(t, venue) for t in uniques], dtype=object)
+        out = mapped[codes]
+        out[codes < 0] = None
+        return out
+
+    def aliases_of(self, symbol):
+        """Every raw (venue, ticker) seen so far that maps to `symbol`."""
+        return sorted((v, t) for v, m in self._maps.items() for t, c in m.items() if c == symbol)
+
+
+SYMBOLS = SymbolRegistry()
@@ -0,0 +1,88 @@
+"""Precomputed table payloads for the arbitrage pages.
+
+Rendering a pandas Styler was the largest per-rerun cost of the pages:
+Streamlit asks the Styler to compute and translate every cell into CSS and
+display strings, then marshals them (~70 ms at the ~330 Multi-DEX symbols,
+~0.5 s at 3000), for every session on every autorefresh although the table
+only changes with the snapshot. `multidex_table` / `hip3_table` build
+everything once per snapshot version and selection — sorted rows, kernel
+results, column_config and an Arrow table — and the page modules cache the
+`TablePayload` for all sessions; a rerun only serializes the Arrow table
+(a fraction of a millisecond at any size).
+
+Highlighting goes through the data instead of cell CSS: the legs are named
+in the Trade Action column ("🟢 LONG x / 🔴 SHORT y") and rows the Styler
+used to highlight (spread alert on Multi-DEX, spread above 100% on HIP-3)
+start with ⚠️; column_config carries the percent formats.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pyarrow as pa
+import streamlit as st
+
+from kernels import opportunity_score, spread_kernel
+
+PCT_FORMAT = "%.2f%%"
+ALERT_MARK = "⚠️ "
+
+
+@dataclass
+class TablePayload:
+    frame: object           # display rows (sorted) and columns
+    column_config: dict
+    arrow: pa.Table         # `frame` without its index, ready for st.dataframe
+    key: str = "table"
+
+
+def _payload(frame, pct_cols, column_config, key, marked):
+    config = {c: st.column_config.NumberColumn(c, format=PCT_FORMAT) for c in pct_cols} | column_config
+    frame = frame.assign(**{'Trade Action': np.where(
+        np.asarray(marked, dtype=bool), ALERT_MARK + frame['Trade Action'].astype(str), frame['Trade Action'])})
+    return TablePayload(frame, config, pa.Table.from_pandas(frame, preserve_index=False), key)
+
+
+def multidex_table(df, selected_ex, with_history=False):
+    """Multi-DEX table of the symbols quoted on >= 2 selected venues (None if none)."""
+    df_live = df[df[selected_ex].notna().sum(axis=1) >= 2]
+    if df_live.empty: return None
+    hist = df_live.reindex(columns=[f"{e}_avg" for e in selected_ex]).to_numpy(dtype=float) if with_history else None
+    res = spread_kernel(df_live[selected_ex].to_numpy(dtype=float), selected_ex, hist=hist)
+
+    order = np.argsort(-res.spread, kind='stable')
+    res = res.take(order)
+    df_final = df_live.iloc[order].copy()
+    df_final['APR Spread'] = res.spread
+    df_final['Opportunity'] = opportunity_score(res.spread)
+    df_final['Trade Action'] = res.action
+    if with_history: df_final['48h Pair Avg'] = res.pair_avg
+
+    cols = ['symbol'] + selected_ex + ['APR Spread']
+    if with_history: cols.append('48h Pair Avg')
+    cols += ['Opportunity', 'Trade Action']
+    final_cols = [c for c in cols if c in df_final.columns]
+
+    pct_cols = [c for c in final_cols if c not in ['symbol', 'Opportunity', 'Trade Action']]
+    return _payload(
+        df_final[final_cols], pct_cols,
+        {"Trade Action": st.column_config.TextColumn("Trade Action", width="large")}, "multidex", res.alert,
+    )
+
+
+def hip3_table(df_matrix, selected_builders):
+    """HIP-3 table of the symbols listed by >= 2 selected builders."""
+    df_sel = df_matrix[selected_builders].dropna(thresh=2)
+    res = spread_kernel(df_sel.to_numpy(dtype=float), selected_builders)
+
+    # Sort only (No filtering on spread or rows limit)
+    order = np.argsort(-res.spread, kind='stable')
+    res = res.take(order)
+    df_final = df_sel.iloc[order].copy()
+    df_final['APR Spread'] = res.spread
+    df_final['Trade Action'] = res.action
+    df_final = df_final.rename_axis('Symbol').reset_index()
+
+    config = {b: st.column_config.NumberColumn(b, format=PCT_FORMAT, width="small") for b in selected_builders}
+    config["APR Spread"] = st.column_config.NumberColumn("Spread", format=PCT_FORMAT, width="small")
+    config["Trade Action"] = st.column_config.TextColumn("Trade Action", width="large")
+    return _payload(df_final, selected_builders + ['APR Spread'], config, "hip3", res.spread > 100)
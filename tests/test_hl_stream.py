@@ -0,0 +1,91 @@
+"""HyperliquidStream against the local mock WebSocket and fake REST venue.
+
+    pytest tests/
+
+Covers the subscription of every REST coin, pushed rates overlaying the REST
+snapshot, a disconnect serving the REST values again, the reconnect, and
+a poller refresh never being overwritten by an older stream publish.
+"""
+import os
+import sys
+import time
+
+import pandas as pd
+import pytest
+
+pytest.importorskip("websockets")
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+from fake_venues import FakeVenueServer, MockHyperliquidWS  # noqa: E402
+from hl_stream import HyperliquidStream  # noqa: E402
+from poller import Poller, SnapshotStore  # noqa: E402
+from venues import TokenBucket  # noqa: E402
+
+REST_APR = 10.0
+APR = lambda funding: funding * 24 * 365 * 100
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline: raise AssertionError("condition not met in time")
+        time.sleep(0.02)
+
+
+def rest_frames():
+    return {'Hyperliquid': pd.DataFrame({'symbol': ['SYM0', 'SYM1'], 'Hyperliquid': [REST_APR, REST_APR]})}
+
+
+def served(store, symbol='SYM0'):
+    snap = store.latest("mainnet")
+    df = snap.data['Hyperliquid'] if snap is not None else None
+    if df is None or symbol not in set(df['symbol']): return None
+    return float(df.set_index('symbol').loc[symbol, 'Hyperliquid'])
+
+
+@pytest.fixture
+def setup():
+    with FakeVenueServer() as srv, MockHyperliquidWS() as ws:
+        poller = Poller()
+        stream = HyperliquidStream(poller.store, url=ws.url, info_url=srv.urls()['Hyperliquid'],
+                                   bucket=TokenBucket(rate=1e9, capacity=1e9), publish_interval=0.05, max_backoff=0.2)
+        poller.add_job("mainnet", lambda: stream.overlay_mainnet(rest_frames()), 60)
+        stream.start()
+        try: yield poller, stream, ws, srv
+        finally: stream.stop()
+
+
+def test_stream_overlay_disconnect_and_reconnect(setup):
+    poller, stream, ws, srv = setup
+    poller.refresh("mainnet")
+    assert served(poller.store) == REST_APR
+
+    # Subscribe: every main dex and HIP-3 coin of the REST universe
+    n_coins = len(srv.payloads['Hyperliquid'][0]['universe']) + sum(len(p[0]['universe']) for p in srv.payloads['hip3'].values())
+    wait_for(lambda: stream.connected and any(len(c) == n_coins for c in ws.subscriptions.values()))
+    assert {'SYM0', 'b0:SYM0'} <= next(iter(ws.subscriptions.values()))
+
+    # Push: the streamed rate is republished over the REST snapshot
+    ws.push('SYM0', 0.0001)
+    wait_for(lambda: served(poller.store) == pytest.approx(APR(0.0001)))
+    assert served(poller.store, 'SYM1') == REST_APR
+
+    # Disconnect: the REST values are served again, without waiting for a refresh
+    ws.disconnect_all()
+    wait_for(lambda: served(poller.store) == REST_APR)
+    assert not stream.live
+
+    # Reconnect: subscribed again, pushes overlay again
+    wait_for(lambda: ws.connections == 2 and stream.connected and any(ws.subscriptions.values()))
+    assert stream.reconnects >= 1
+    wait_for(lambda: any(len(c) == n_coins for c in ws.subscriptions.values()))
+    ws.push('SYM0', 0.0002)
+    wait_for(lambda: served(poller.store) == pytest.approx(APR(0.0002)))
+
+
+def test_publish_keeps_a_newer_poller_refresh():
+    store = SnapshotStore()
+    read = store.publish("mainnet", "rest v1").version
+    store.publish("mainnet", "rest v2")          # poller refresh between the stream's read and publish
+    assert store.publish("mainnet", "overlay of v1", if_version=read) is None
+    assert store.latest("mainnet").data == "rest v2"
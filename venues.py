@@ -0,0 +1,339 @@
+"""Shared venue-fetch engine for the dashboard and the recorder.
+
+Each exchange is described by a `Venue` adapter (endpoint + parser). The
+`FetchEngine` keeps one pooled keep-alive `requests.Session` and a long-lived
+worker pool, and fetches every venue at the same time from an asyncio loop
+with a per-venue timeout and a total deadline. A venue that fails or misses
+the deadline comes back as an empty frame, so a snapshot always has one entry
+per venue and takes as long as the slowest venue at most.
+
+Every venue fetch yields a `FetchStat` (latency, bytes, parse time, rows,
+error class): the engine keeps the last one per venue in `stats` and records
+them in the process-wide metrics (`metrics.VENUE_METRICS`), so an empty frame
+from a timeout is no longer indistinguishable from an empty market list.
+
+Unchanged responses are not parsed again: the engine sends If-None-Match /
+If-Modified-Since when a venue returned an ETag / Last-Modified, and
+otherwise compares a hash of the raw body with the previous one. Either way
+the venue's previous frame object is returned, which lets `VenueMatrix`
+rebuild only the columns of venues whose frame actually changed.
+
+Hyperliquid's info endpoint has a per-IP weight budget: its calls take their
+weight from `HL_RATE_LIMITER`, the process-wide token bucket also used by the
+HIP-3 fetcher and the stream's universe lookup.
+
+Venue tickers are mapped to canonical symbols by the shared registry
+(`symbols.SYMBOLS`), and `combine` builds the symbol x venue matrix in one
+pass from per-venue arrays coded against a shared index.
+"""
+import asyncio
+import concurrent.futures
+import hashlib
+import threading
+import time
+from dataclasses import dataclass, field, replace
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+from metrics import VENUE_METRICS
+from symbols import SYMBOLS
+
+VAR_URL = "https://omni-client-api.prod.ap-northeast-1.variational.io/metadata/stats"
+HL_URL = "https://api.hyperliquid.xyz/info"
+LIGHTER_URL = "https://mainnet.zklighter.elliot.ai/api/v1/funding-rates"
+EXT_URL = "https://api.starknet.extended.exchange/api/v1/info/markets"
+PAC_URL = "https://api.pacifica.fi/api/v1/info"
+
+EXCHANGES = ['Variational', 'Hyperliquid', 'Lighter', 'Extended', 'Pacifica']
+USER_AGENT = "Mozilla/5.0"
+
+# Hyperliquid: 1200 weight per minute per IP, meta / perpDexs / metaAndAssetCtxs weigh 20
+HL_WEIGHT_PER_MINUTE = 1200
+INFO_WEIGHT = 20
+
+
+# ==============================================================================
+#                               RATE CONTROL
+# ==============================================================================
+class TokenBucket:
+    def __init__(self, rate, capacity):
+        self.rate, self.capacity = rate, capacity   # tokens per second, burst size
+        self._tokens = capacity
+        self._stamp = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, weight=1):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= weight:
+                    self._tokens -= weight
+                    return
+                wait = (weight - self._tokens) / self.rate
+            time.sleep(wait)
+
+# One bucket per process: every Hyperliquid caller shares the IP's budget.
+HL_RATE_LIMITER = TokenBucket(rate=HL_WEIGHT_PER_MINUTE / 60, capacity=10 * INFO_WEIGHT)
+
+
+# ==============================================================================
+#                               PARSERS (raw JSON -> [venue ticker, APR])
+# ==============================================================================
+# Tickers are mapped to canonical symbols by the engine (symbols.SYMBOLS)
+def parse_variational(r):
+    df = pd.DataFrame(r['listings'])
+    df['Variational'] = pd.to_numeric(df['funding_rate']) * 100
+    return df[['ticker', 'Variational']].rename(columns={'ticker': 'symbol'})
+
+def parse_hyperliquid(r):
+    data = [{'symbol': m['name'], 'Hyperliquid': (float(r[1][i]['funding']) * 3 * 365 * 100 * 8)} for i, m in enumerate(r[0]['universe'])]
+    return pd.DataFrame(data, columns=['symbol', 'Hyperliquid'])
+
+def parse_lighter(r):
+    data = [{'symbol': i['symbol'], 'Lighter': (float(i['rate']) * 3 * 365 * 100)} for i in r.get('funding_rates', [])]
+    return pd.DataFrame(data, columns=['symbol', 'Lighter'])
+
+def parse_extended(r):
+    data = []
+    for item in r.get('data', []):
+        rate = float(item.get('marketStats', {}).get('fundingRate', 0))
+        data.append({'symbol': item.get('name', ''), 'Extended': rate * 24 * 365 * 100})
+    return pd.DataFrame(data, columns=['symbol', 'Extended'])
+
+def parse_pacifica(r):
+    data = []
+    for item in r.get('data', []):
+        rate = float(item.get('next_funding_rate', 0))
+        data.append({'symbol': item.get('symbol', ''), 'Pacifica': rate * 24 * 365 * 100})
+    return pd.DataFrame(data, columns=['symbol', 'Pacifica'])
+
+
+# ==============================================================================
+#                               VENUE ADAPTERS
+# ==============================================================================
+@dataclass
+class Venue:
+    name: str
+    url: str
+    parse: object
+    method: str = "GET"
+    headers: dict = field(default_factory=dict)
+    payload: object = None
+    timeout: float = 5.0
+    bucket: object = None           # TokenBucket charged `weight` before each request
+    weight: int = 0
+
+    def empty(self):
+        return pd.DataFrame(columns=['symbol', self.name])
+
+def default_venues(ext_api_key=None, pac_api_key=None, timeout=5.0, urls=None, hl_bucket=None):
+    """The five mainnet venues. `urls` overrides endpoints by venue name (fake server),
+    `hl_bucket` replaces HL_RATE_LIMITER for the Hyperliquid call."""
+    urls = urls or {}
+    venues = [
+        Venue('Variational', VAR_URL, parse_variational, timeout=timeout),
+        Venue('Hyperliquid', HL_URL, parse_hyperliquid, method="POST", payload={"type": "metaAndAssetCtxs"}, timeout=timeout,
+              bucket=hl_bucket or HL_RATE_LIMITER, weight=INFO_WEIGHT),
+        Venue('Lighter', LIGHTER_URL, parse_lighter, headers={"accept": "application/json"}, timeout=timeout),
+        Venue('Extended', EXT_URL, parse_extended, headers={"X-Api-Key": ext_api_key or ""}, timeout=timeout),
+        Venue('Pacifica', PAC_URL, parse_pacifica, headers={"X-Api-Key": pac_api_key or ""}, timeout=timeout),
+    ]
+    for v in venues: v.url = urls.get(v.name, v.url)
+    return venues
+
+
+# ==============================================================================
+#                               FETCH ENGINE
+# ==============================================================================
+@dataclass
+class FetchStat:
+    venue: str
+    latency: float = None       # request seconds (until the failure for errors)
+    bytes: int = 0
+    parse_time: float = 0.0
+    rows: int = 0
+    error: str = None           # error class, None on success
+    cache: str = None           # "304" / "hash" when the previous frame was reused
+    started_at: float = 0.0
+    finished_at: float = 0.0
+
+def error_class(e):
+    """Short, stable label of a fetch failure (metric label / health panel)."""
+    if isinstance(e, (asyncio.TimeoutError, requests.Timeout)): return "Timeout"
+    if isinstance(e, requests.HTTPError) and e.response is not None: return f"HTTP {e.response.status_code}"
+    if isinstance(e, requests.ConnectionError): return "ConnectionError"
+    return type(e).__name__
+
+@dataclass
+class _CachedResponse:
+    digest: bytes
+    etag: str
+    last_modified: str
+    frame: pd.DataFrame
+
+class FetchEngine:
+    def __init__(self, venues, deadline=8.0, pool_size=10):
+        self.venues = list(venues)
+        self.deadline = deadline
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = USER_AGENT
+        adapter = HTTPAdapter(pool_connections=max(len(self.venues), 1), pool_maxsize=pool_size)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        # Own pool (not the loop's default executor) so a hung socket never
+        # holds `asyncio.run` past the deadline and no pool is built per refresh.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=pool_size, thread_name_prefix="venue")
+        self.stats = {}             # venue -> FetchStat of the last refresh
+        self.last_success = {}      # venue -> time.time() of the last successful fetch
+        self._cache = {}            # venue -> _CachedResponse of the last parsed body
+
+    def request(self, method, url, timeout, **kwargs):
+        r = self.session.request(method, url, timeout=timeout, **kwargs)
+        r.raise_for_status()
+        return r
+
+    def _fetch_one(self, venue, stat):
+        cached = self._cache.get(venue.name)
+        headers = dict(venue.headers)
+        if cached is not None:
+            if cached.etag: headers["If-None-Match"] = cached.etag
+            if cached.last_modified: headers["If-Modified-Since"] = cached.last_modified
+        if venue.bucket is not None: venue.bucket.acquire(venue.weight)
+        t0 = time.perf_counter()
+        r = self.request(venue.method, venue.url, venue.timeout, headers=headers, json=venue.payload)
+        stat.latency, stat.bytes = time.perf_counter() - t0, len(r.content)
+        t1 = time.perf_counter()
+        if r.status_code == 304 and cached is not None:
+            df, stat.cache = cached.frame, "304"
+        else:
+            digest = hashlib.blake2b(r.content, digest_size=16).digest()
+            if cached is not None and cached.digest == digest:
+                df, stat.cache = cached.frame, "hash"
+            else:
+                df = venue.parse(r.json())
+                df['symbol'] = SYMBOLS.normalize(df['symbol'], venue.name)
+            self._cache[venue.name] = _CachedResponse(digest, r.headers.get("ETag"), r.headers.get("Last-Modified"), df)
+        stat.parse_time, stat.rows = time.perf_counter() - t1, len(df)
+        return df
+
+    async def _fetch_venue(self, venue):
+        loop = asyncio.get_running_loop()
+        stat = FetchStat(venue.name, started_at=time.time())
+        t0 = time.perf_counter()
+        try:
+            df = await asyncio.wait_for(loop.run_in_executor(self._executor, self._fetch_one, venue, stat), venue.timeout)
+        except Exception as e:
+            df = venue.empty()
+            stat.error = error_class(e)
+            stat.latency = stat.latency if stat.latency is not None else time.perf_counter() - t0
+        self._record(stat)
+        return df
+
+    def _record(self, stat):
+        # Copy: a timed-out worker thread may still fill in the original later
+        stat = replace(stat, finished_at=time.time())
+        self.stats[stat.venue] = stat
+        if not stat.error: self.last_success[stat.venue] = stat.finished_at
+        VENUE_METRICS.record(stat)
+
+    async def fetch_all(self):
+        tasks = [asyncio.ensure_future(self._fetch_venue(v)) for v in self.venues]
+        done, pending = await asyncio.wait(tasks, timeout=self.deadline)
+        for t in pending: t.cancel()
+        for v, t in zip(self.venues, tasks):
+            if t not in done: self._record(FetchStat(v.name, latency=self.deadline, error="DeadlineExceeded"))
+        return {v.name: (t.result() if t in done else v.empty()) for v, t in zip(self.venues, tasks)}
+
+    def health(self):
+        """Per-venue status of the last refresh, with staleness since the last success."""
+        now = time.time()
+        return {
+            v.name: {
+                'stat': self.stats.get(v.name),
+                'staleness': now - self.last_success[v.name] if v.name in self.last_success else None,
+            }
+            for v in self.venues
+        }
+
+    def snapshot(self):
+        """Blocking entry point: {venue name: DataFrame[symbol, venue]}."""
+        return asyncio.run(self.fetch_all())
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        self.session.close()
+
+
+def _venue_arrays(df, name):
+    return df['symbol'].to_numpy(dtype=object), pd.to_numeric(df[name], errors='coerce').to_numpy(dtype=float)
+
+def _mean_by_code(codes, values, n):
+    # Duplicate symbols collapse to their mean (as in the history store)
+    ok = (codes >= 0) & ~np.isnan(values)
+    sums = np.bincount(codes[ok], weights=values[ok], minlength=n)
+    counts = np.bincount(codes[ok], minlength=n)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan)
+
+def combine(frames):
+    """Single-pass symbol x venue matrix from {venue: DataFrame[symbol, venue]}.
+
+    Every venue's symbols are coded against one shared, sorted index and
+    scattered straight into their column. Returns (symbol Index, {venue: array}).
+    """
+    names = list(frames)
+    arrays = [_venue_arrays(frames[n], n) for n in names]
+    symbols = np.concatenate([a[0] for a in arrays]) if arrays else np.array([], dtype=object)
+    codes, index = pd.factorize(symbols, sort=True)
+    bounds = np.cumsum([0] + [len(a[0]) for a in arrays])
+    columns = {n: _mean_by_code(codes[bounds[j]:bounds[j + 1]], arrays[j][1], len(index)) for j, n in enumerate(names)}
+    return pd.Index(index, dtype=object, name='symbol'), columns
+
+def _to_frame(index, columns):
+    return pd.DataFrame({'symbol': index.to_numpy(), **columns})
+
+class VenueMatrix:
+    """Symbol x venue table maintained across refreshes.
+
+    `update` only recomputes the columns whose frame object changed since the
+    previous call (the engine returns the same object for unchanged venues),
+    coded against the existing symbol index; a full `combine` only runs when a
+    venue's symbol list changed. The returned frame is shared: do not mutate it.
+    """
+
+    def __init__(self):
+        self._frames = {}
+        self._index = None
+        self._columns = {}      # venue -> values aligned on self._index
+        self._df = None
+        self._lock = threading.Lock()
+
+    def update(self, frames):
+        with self._lock: return self._update(frames)
+
+    def _update(self, frames):
+        changed = [n for n, d in frames.items() if self._frames.get(n) is not d]
+        if self._df is not None and not changed and list(frames) == list(self._frames): return self._df
+        same_symbols = self._index is not None and list(frames) == list(self._frames) and all(
+            np.array_equal(frames[n]['symbol'].to_numpy(dtype=object), self._frames[n]['symbol'].to_numpy(dtype=object))
+            for n in changed
+        )
+        if same_symbols:
+            for n in changed:
+                symbols, values = _venue_arrays(frames[n], n)
+                self._columns[n] = _mean_by_code(self._index.get_indexer(symbols), values, len(self._index))
+        else:
+            self._index, self._columns = combine(frames)
+        self._frames = dict(frames)
+        self._df = _to_frame(self._index, {n: self._columns[n] for n in frames})
+        return self._df
+
+def merge_venues(frames):
+    """One-off symbol x venue table (no state kept between calls)."""
+    if not isinstance(frames, dict): frames = {d.columns[1]: d for d in frames}
+    return _to_frame(*combine(frames))